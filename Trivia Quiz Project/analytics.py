@@ -0,0 +1,113 @@
+# Difficulty levels, used to label a quiz by its average difficulty
+DIFFICULTY_LEVELS = {"Easy": 1, "Medium": 2, "Hard": 3}
+
+
+def difficulty_mix(counts):
+    """Label ("Easy", "Medium" or "Hard") for a quiz's average difficulty, from {difficulty: count}"""
+    total = sum(counts.values())
+    if not total:
+        return "Medium"
+    average = sum(DIFFICULTY_LEVELS.get(difficulty, 2) * n for difficulty, n in counts.items()) / total
+    if average < 5 / 3:
+        return "Easy"
+    if average > 7 / 3:
+        return "Hard"
+    return "Medium"
+
+
+class GroupStats:
+    """Running totals for one question type, difficulty or category"""
+
+    __slots__ = ('count', 'correct', 'total_time')
+
+    def __init__(self):
+        self.count = 0
+        self.correct = 0
+        self.total_time = 0.0
+
+    @property
+    def accuracy(self):
+        return self.correct / self.count if self.count else 0.0
+
+    @property
+    def average_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+
+class QuizStats:
+    """Per-quiz statistics, updated once per recorded answer
+
+    Everything the results page shows (score progression, accuracy by type,
+    difficulty and category, time metrics, correct/incorrect counts) is kept
+    as running totals, so building the page never has to walk the answers.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.correct = 0
+        self.total_time = 0.0
+        self.fastest = None
+        self.slowest = None
+        # Per-question series for the charts
+        self.cumulative_scores = []
+        self.accuracy_rates = []
+        self.times = []
+        self.correctness = []
+        self.by_type = {}
+        self.by_difficulty = {}
+        self.by_category = {}
+
+    @classmethod
+    def from_answers(cls, answers, questions):
+        """Stats for existing answer records and the questions they answer"""
+        stats = cls()
+        for answer, question in zip(answers, questions):
+            stats.add(answer, question)
+        return stats
+
+    def add(self, answer, question):
+        """Fold one answer record (and its question's type and difficulty) into the totals"""
+        is_correct = bool(answer.is_correct)
+        time_taken = answer.time_taken
+
+        self.count += 1
+        self.correct += is_correct
+        self.total_time += time_taken
+        if self.fastest is None or time_taken < self.fastest:
+            self.fastest = time_taken
+        if self.slowest is None or time_taken > self.slowest:
+            self.slowest = time_taken
+
+        self.cumulative_scores.append(self.correct)
+        self.accuracy_rates.append(self.correct / self.count * 100)
+        self.times.append(time_taken)
+        self.correctness.append(is_correct)
+
+        for groups, key in (
+            (self.by_type, question.type),
+            (self.by_difficulty, question.difficulty),
+            (self.by_category, answer.category)
+        ):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = GroupStats()
+            group.count += 1
+            group.correct += is_correct
+            group.total_time += time_taken
+
+    @property
+    def incorrect(self):
+        return self.count - self.correct
+
+    @property
+    def average_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+    @property
+    def difficulty_mix(self):
+        return difficulty_mix({difficulty: group.count for difficulty, group in self.by_difficulty.items()})
+
+    def difficulty_count(self, difficulty):
+        """Number of answered questions of one difficulty"""
+        group = self.by_difficulty.get(difficulty)
+        return group.count if group else 0
@@ -0,0 +1,114 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+# Flush once this many items are waiting, or once the oldest has waited FLUSH_INTERVAL seconds
+FLUSH_BATCH_SIZE = int(os.environ.get("TRIVIA_FLUSH_BATCH_SIZE", 100))
+FLUSH_INTERVAL = float(os.environ.get("TRIVIA_FLUSH_INTERVAL", 0.5))
+# Attempts at writing one batch before it is dropped (and logged)
+FLUSH_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Daemon thread that hands queued items to ``flush(items)`` in batches
+
+    ``submit`` only enqueues, so callers never wait on the disk. The thread
+    takes the first waiting item, then keeps collecting until ``batch_size``
+    items are waiting or ``interval`` seconds have passed, and writes them
+    with one ``flush`` call. ``close`` (also registered with atexit) writes
+    whatever is still queued before the thread stops.
+    """
+
+    def __init__(self, flush, batch_size=FLUSH_BATCH_SIZE, interval=FLUSH_INTERVAL, name="background-writer"):
+        self._flush = flush
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, item):
+        """Queue an item for the next flush"""
+        if self._closed:
+            raise RuntimeError("writer is closed")
+        self._queue.put(item)
+
+    def pending(self):
+        """Approximate number of items not yet written"""
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """Block until everything submitted so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write everything still queued and stop the thread (safe to call twice)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.interval
+        stop = False
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _write(self, batch):
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            try:
+                self._flush(batch)
+                return
+            except Exception:
+                if attempt == FLUSH_ATTEMPTS:
+                    logger.exception("Dropping %d queued writes after %d failed attempts", len(batch), attempt)
+                else:
+                    logger.exception("Background write failed, retrying")
+                    time.sleep(self.interval)
+
+    def _drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                batch, stop = [], True
+            else:
+                batch, stop = self._collect(item)
+            if stop:
+                # Write whatever is left right away instead of waiting out the interval
+                batch.extend(self._drain())
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
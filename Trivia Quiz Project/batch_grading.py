@@ -0,0 +1,214 @@
+"""Grade many answer sheets at once, outside of Streamlit
+
+An answer sheet is a set of rows (user, question_id, answer), read from CSV
+(with a header row) or JSONL. Every answer is graded against the question
+bank the same way the quiz grades it, and each user's answers are folded
+into a leaderboard entry that can be recorded like a finished quiz.
+
+Usage:
+    python batch_grading.py sheets.csv [--output graded.jsonl] [--record]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+
+from analytics import difficulty_mix
+from grading import FUZZY_DISTANCE
+from question_bank import QuestionBank
+from quiz_engine import AnswerRecord, QuizEngine, result_entry
+
+# Column names accepted for the user (first match wins); the others are fixed
+USER_COLUMNS = ("user", "username")
+REQUIRED_COLUMNS = ("question_id", "answer")
+
+
+def _read_jsonl(f):
+    for line_number, line in enumerate(f, start=1):
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {line_number} is not valid JSON: {e}") from None
+            if not isinstance(row, dict):
+                raise ValueError(f"line {line_number} is not a JSON object")
+            yield row
+
+
+def read_sheets(path):
+    """Rows of (user, question_id, answer, time_taken) from a CSV or JSONL file
+
+    ``time_taken`` is an optional column/key in seconds and defaults to 0.
+    Missing values come through as None for ``BatchGrader.grade`` to report.
+    Raises ValueError if a CSV header lacks a required column or a JSONL
+    line is not a JSON object.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith(".jsonl"):
+            rows = _read_jsonl(f)
+        else:
+            rows = csv.DictReader(f)
+            columns = rows.fieldnames or []
+            missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+            if not any(column in columns for column in USER_COLUMNS):
+                missing.insert(0, " or ".join(USER_COLUMNS))
+            if missing:
+                raise ValueError(f"{path} has no {', '.join(missing)} column in its header")
+        for row in rows:
+            user = next((row[column] for column in USER_COLUMNS if row.get(column)), None)
+            answer = row.get('answer')
+            yield user, row.get('question_id'), None if answer is None else str(answer), row.get('time_taken')
+
+
+class BatchResult:
+    """Graded answers per user, their leaderboard entries and rows that could not be graded"""
+
+    def __init__(self):
+        # username -> [AnswerRecord, ...] in sheet order
+        self.records = {}
+        self.entries = []
+        # (row number, reason) for skipped rows
+        self.errors = []
+
+    @property
+    def answer_count(self):
+        return sum(len(records) for records in self.records.values())
+
+
+class BatchGrader:
+    """Grades answer sheets in one pass against a fully loaded question bank
+
+    Grades are memoized per distinct (question ID, answer), so a class
+    writing the same answers costs one normalization and lookup per distinct
+    answer rather than per sheet. Only a user's first answer to a question
+    counts; later ones are reported as errors, as is a time that is negative
+    or not a finite number.
+    """
+
+    def __init__(self, bank, fuzzy_distance=FUZZY_DISTANCE, clock=time.time):
+        self.bank = bank
+        self.fuzzy_distance = fuzzy_distance
+        self.clock = clock
+        bank.load_all()
+        # (question ID, raw answer) -> (is_correct, normalized answer)
+        self._memo = {}
+
+    def grade(self, rows):
+        """Grade (user, question_id, answer, time_taken) rows; returns a BatchResult"""
+        result = BatchResult()
+        memo = self._memo
+        get_question = self.bank.get
+        # (user, question ID) pairs already graded in this batch
+        answered = set()
+        for row_number, (user, question_id, answer, time_taken) in enumerate(rows, start=1):
+            if not user:
+                result.errors.append((row_number, "missing user"))
+                continue
+            if not question_id:
+                result.errors.append((row_number, "missing question_id"))
+                continue
+            if answer is None:
+                result.errors.append((row_number, "missing answer"))
+                continue
+            try:
+                seconds = float(time_taken or 0)
+            except (TypeError, ValueError):
+                seconds = math.nan
+            if not (math.isfinite(seconds) and seconds >= 0):
+                result.errors.append((row_number, f"bad time_taken {time_taken!r}"))
+                continue
+            question = get_question(question_id)
+            if question is None:
+                result.errors.append((row_number, f"unknown question {question_id!r}"))
+                continue
+            if (user, question_id) in answered:
+                result.errors.append((row_number, f"{user} already answered question {question_id!r}"))
+                continue
+            answered.add((user, question_id))
+            graded = memo.get((question_id, answer))
+            if graded is None:
+                is_correct, normalized, _ = QuizEngine.grade(question, answer, self.fuzzy_distance)
+                graded = memo[(question_id, answer)] = (is_correct, normalized)
+            result.records.setdefault(user, []).append(
+                AnswerRecord(question_id, question.category, graded[1], graded[0], seconds)
+            )
+
+        now = self.clock()
+        for user, records in result.records.items():
+            categories = {record.category for record in records}
+            difficulties = Counter(get_question(record.question_id).difficulty for record in records)
+            result.entries.append(result_entry(
+                user,
+                sum(record.is_correct for record in records),
+                len(records),
+                sum(record.time_taken for record in records),
+                categories.pop() if len(categories) == 1 else "All",
+                now,
+                difficulty_mix(difficulties)
+            ))
+        return result
+
+
+def record_results(leaderboard, entries):
+    """Record every entry of a batch on a SharedLeaderboard with one log write and one transaction"""
+    leaderboard.record_many(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sheets", help="CSV (user,question_id,answer[,time_taken]) or .jsonl file")
+    parser.add_argument("--output", help="write each user's entry and graded answers here as JSONL")
+    parser.add_argument("--record", action="store_true", help="record the entries on the leaderboard")
+    parser.add_argument("--leaderboard", default="leaderboard.json", help="leaderboard file used with --record")
+    parser.add_argument("--users-db", default="users.db", help="user stats database used with --record")
+    parser.add_argument("--fuzzy-distance", type=int, default=FUZZY_DISTANCE)
+    args = parser.parse_args()
+
+    grader = BatchGrader(QuestionBank.from_directory(), args.fuzzy_distance)
+    started = time.perf_counter()
+    try:
+        result = grader.grade(read_sheets(args.sheets))
+    except (OSError, ValueError) as e:
+        parser.exit(2, f"error: {e}\n")
+    elapsed = time.perf_counter() - started
+
+    for row_number, reason in result.errors:
+        print(f"row {row_number}: {reason}", file=sys.stderr)
+    print(f"Graded {result.answer_count} answers from {len(result.entries)} users in {elapsed * 1000:.1f} ms "
+          f"({len(result.entries) / elapsed if elapsed else 0:.0f} sheets/s), {len(result.errors)} rows skipped")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for entry in result.entries:
+                answers = [
+                    {
+                        'question_id': record.question_id,
+                        'user_answer': record.user_answer,
+                        'is_correct': record.is_correct,
+                        'time_taken': record.time_taken
+                    }
+                    for record in result.records[entry['username']]
+                ]
+                f.write(json.dumps(dict(entry, answers=answers)) + "\n")
+
+    if args.record:
+        # Imported here so grading alone never touches the leaderboard files
+        from leaderboard import SharedLeaderboard
+        from leaderboard_store import LeaderboardStore
+        from user_stats import UserStatsStore
+
+        store = LeaderboardStore(args.leaderboard)
+        users, boards = store.load()
+        user_store = UserStatsStore(args.users_db)
+        user_store.import_users(users)
+        record_results(SharedLeaderboard(store, user_store, boards), result.entries)
+        user_store.close()
+        print(f"Recorded {len(result.entries)} results in {os.path.abspath(args.leaderboard)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Concurrent quiz sessions driven straight through the QuizEngine
+
+Simulates many players at once, each running the app's flow: start a quiz,
+answer every question, finish and record the result on a shared leaderboard
+backed by a scratch LeaderboardStore. Reports p50/p95/p99 latency per step,
+the quiz completion rate, how many results per second the log and user
+database writes persist (timed around the writes themselves, wherever they
+run), and the memory one live quiz session holds.
+
+Usage:
+    python benchmarks/bench_load.py [--users 200] [--threads 16] [--questions 10]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from leaderboard import SharedLeaderboard  # noqa: E402
+from leaderboard_store import LeaderboardStore  # noqa: E402
+from question_bank import QuestionBank  # noqa: E402
+from quiz_engine import QuizEngine  # noqa: E402
+from user_stats import UserStatsStore  # noqa: E402
+
+STEPS = ("start_quiz", "check_answer", "update_leaderboard")
+QUESTION_TYPES = ["multiple_choice", "true_false", "fill_blank"]
+
+
+class WriteTimer:
+    """Wraps a batch write method, recording the items written and when each call ran"""
+
+    def __init__(self, write):
+        self._write = write
+        self._lock = threading.Lock()
+        self.items = 0
+        # (start, end) of every call
+        self.intervals = []
+
+    def __call__(self, items, **options):
+        started = time.perf_counter()
+        self._write(items, **options)
+        ended = time.perf_counter()
+        with self._lock:
+            self.items += len(items)
+            self.intervals.append((started, ended))
+
+    @property
+    def calls(self):
+        return len(self.intervals)
+
+
+def busy_seconds(*timers):
+    """Wall time during which at least one write was running
+
+    Concurrent writes (--sync-writes with many threads) wait on the same
+    lock, so adding up their durations would count that waiting many times.
+    """
+    total = 0.0
+    end = None
+    for started, ended in sorted(interval for timer in timers for interval in timer.intervals):
+        if end is None or started > end:
+            total += ended - started
+            end = ended
+        elif ended > end:
+            total += ended - end
+            end = ended
+    return total
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def pick_answer(question, rng):
+    """A plausible answer: right about half the time"""
+    if rng.random() < 0.5:
+        return question.answer
+    if question.options:
+        return rng.choice(question.options)
+    return "not sure"
+
+
+def play(engine, user_id, args, timings, lock):
+    """One simulated player from setup screen to results page"""
+    rng = random.Random(args.seed + user_id)
+    categories = ["All"] + engine.bank.categories
+    local = {step: [] for step in STEPS}
+
+    started = time.perf_counter()
+    session = engine.start(
+        f"load-{user_id}", rng.choice(categories), args.questions, QUESTION_TYPES, seed=args.seed + user_id
+    )
+    local["start_quiz"].append(time.perf_counter() - started)
+
+    while True:
+        if args.think:
+            time.sleep(args.think / 1000)
+        started = time.perf_counter()
+        engine.submit(session, pick_answer(session.current_question, rng))
+        local["check_answer"].append(time.perf_counter() - started)
+        if not engine.next_question(session):
+            break
+
+    started = time.perf_counter()
+    engine.finish(session)
+    local["update_leaderboard"].append(time.perf_counter() - started)
+
+    with lock:
+        for step in STEPS:
+            timings[step].extend(local[step])
+
+
+def session_memory(engine, args, sessions=200):
+    """Average bytes held by one quiz session played to its last question"""
+    rng = random.Random(args.seed)
+    # Load every shard first so only per-session allocations are counted
+    for category in engine.bank.categories:
+        engine.bank.sample(category, QUESTION_TYPES, 1)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    live = []
+    for user_id in range(sessions):
+        session = engine.start(f"mem-{user_id}", "All", args.questions, QUESTION_TYPES, seed=user_id)
+        while True:
+            engine.submit(session, pick_answer(session.current_question, rng))
+            if not engine.next_question(session):
+                break
+        live.append(session)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return allocated / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200, help="simulated players")
+    parser.add_argument("--threads", type=int, default=16, help="players running at once")
+    parser.add_argument("--questions", type=int, default=10, help="questions per quiz")
+    parser.add_argument("--think", type=float, default=0, help="pause before each answer, in ms")
+    parser.add_argument("--sync-writes", action="store_true",
+                        help="save each result inside finish instead of on the background writer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="trivia-load-")
+    try:
+        store = LeaderboardStore(os.path.join(workdir, "leaderboard.json"))
+        _, boards = store.load()
+        user_store = UserStatsStore(os.path.join(workdir, "users.db"))
+        # Time the writes where they happen, on the background writer or inside finish
+        log_writes = store.append_many = WriteTimer(store.append_many)
+        db_writes = user_store.record_many = WriteTimer(user_store.record_many)
+        leaderboard = SharedLeaderboard(store, user_store, boards, background=not args.sync_writes)
+        engine = QuizEngine(QuestionBank.from_directory(), leaderboard)
+
+        timings = {step: [] for step in STEPS}
+        lock = threading.Lock()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            futures = [pool.submit(play, engine, user_id, args, timings, lock) for user_id in range(args.users)]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+        # Write timings count every result, so wait for the background writer to catch up
+        leaderboard.close()
+
+        per_session = session_memory(QuizEngine(QuestionBank.from_directory()), args)
+        user_store.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.users} players, {args.threads} threads, {args.questions} questions each, "
+          f"{elapsed:.2f} s wall")
+    for step in STEPS:
+        values = sorted(timings[step])
+        print(f"{step:>18}: p50 {percentile(values, 0.50) * 1000:8.3f} ms   "
+              f"p95 {percentile(values, 0.95) * 1000:8.3f} ms   "
+              f"p99 {percentile(values, 0.99) * 1000:8.3f} ms   ({len(values)} calls)")
+    print(f"{'quizzes finished':>18}: {len(timings['update_leaderboard']) / elapsed:8.1f} /s (wall clock, includes --think)")
+    for name, writes in (("log writes", log_writes), ("users.db writes", db_writes)):
+        seconds = busy_seconds(writes)
+        print(f"{name:>18}: {writes.items} results in {writes.calls} batches, "
+              f"{seconds * 1000:8.1f} ms ({writes.items / seconds if seconds else 0:8.1f} results/s)")
+    write_seconds = busy_seconds(log_writes, db_writes)
+    print(f"{'results persisted':>18}: {db_writes.items / write_seconds if write_seconds else 0:8.1f} /s of write time")
+    print(f"{'memory/session':>18}: {per_session / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Micro-benchmarks for the quiz's hot paths at growing data sizes
+
+Times question selection and category lookup on synthetic banks, answer
+grading, leaderboard inserts and store save/load at several board sizes, and
+the results-page aggregation. Each case reports the best per-call time over
+a few timeit repeats, so runs can be compared across sizes (scaling curves)
+and across commits (save a baseline, then compare against it).
+
+Usage:
+    python benchmarks/bench_micro.py [--quick] [--banks 1000,100000,1000000]
+                                     [--boards 50,10000,1000000]
+                                     [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from analytics import QuizStats  # noqa: E402
+from leaderboard import Leaderboards, TopK, leaderboard_key  # noqa: E402
+from leaderboard_store import LeaderboardStore  # noqa: E402
+from question_bank import QuestionBank  # noqa: E402
+from quiz_engine import AnswerRecord, QuizEngine  # noqa: E402
+from rank_index import ScoreRanks  # noqa: E402
+
+CATEGORIES = ["Science", "Geography", "History", "Technology", "Entertainment", "Sports"]
+TYPES = ["multiple_choice", "true_false", "fill_blank"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+REPEATS = 5
+
+
+def measure(func, repeats=REPEATS):
+    """Best seconds per call of a zero-argument callable"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeats, number)) / number
+
+
+def synthetic_bank(size, seed=0):
+    """Bank of ``size`` generated questions spread over the usual categories"""
+    rng = random.Random(seed)
+    questions = {category: [] for category in CATEGORIES}
+    for i in range(size):
+        question_type = TYPES[i % len(TYPES)]
+        options = ["True", "False"] if question_type == "true_false" else [f"opt{j}" for j in range(4)]
+        questions[CATEGORIES[i % len(CATEGORIES)]].append({
+            'id': f"q{i}",
+            'question': f"Synthetic question {i}?",
+            'options': options if question_type != "fill_blank" else [],
+            'answer': rng.choice(options),
+            'explanation': "",
+            'difficulty': DIFFICULTIES[rng.randrange(len(DIFFICULTIES))],
+            'type': question_type
+        })
+    return QuestionBank.from_dict(questions)
+
+
+def synthetic_results(size, seed):
+    """``size`` quiz results in leaderboard rank order, as a snapshot stores them"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    timestamp, date = now.isoformat(), now.strftime("%Y-%m-%d %H:%M:%S")
+    results = []
+    for i in range(size):
+        score = rng.randint(0, 10)
+        results.append({
+            'username': f"user{i}",
+            'score': score,
+            'total_questions': 10,
+            'percentage': score * 10.0,
+            'time_taken': rng.uniform(20, 300),
+            'category': rng.choice(CATEGORIES),
+            'timestamp': timestamp,
+            'date': date
+        })
+    results.sort(key=leaderboard_key)
+    return results
+
+
+def global_board_snapshot(entries):
+    """Snapshot holding a full all-time "All" board; the other boards start empty"""
+    return {'boards': [{'category': "All", 'period': "all_time", 'period_key': "all_time", 'entries': entries}]}
+
+
+def bench_bank(size, results):
+    bank = synthetic_bank(size)
+    # Load every category up front; lazy shard loading is bench_startup's business
+    bank.sample("All", TYPES, 1)
+    rng = random.Random(1)
+    ids = itertools.cycle([f"q{rng.randrange(size)}" for _ in range(1024)])
+    results.append(("select", "sample 10, All", size, measure(lambda: bank.sample("All", TYPES, 10))))
+    results.append(("select", "sample 10, one category/type",
+                    size, measure(lambda: bank.sample("Science", ["multiple_choice"], 10))))
+    results.append(("lookup", "category_of", size, measure(lambda: bank.category_of(next(ids)))))
+
+
+def bench_grading(results):
+    bank = synthetic_bank(len(TYPES) * len(CATEGORIES))
+    by_type = {question.type: question for question in bank.sample("All", TYPES, 1000)}
+    for question_type, question in sorted(by_type.items()):
+        answer = " " + question.answer.upper() + " " if question_type == "fill_blank" else question.answer
+        results.append(("grade", question_type, 1, measure(lambda: QuizEngine.grade(question, answer))))
+
+
+def bench_board(size, results):
+    entries = synthetic_results(size, seed=2)
+    incoming = itertools.cycle(synthetic_results(1024, seed=3))
+    board = TopK(size, entries)
+    results.append(("board", "TopK.push", size, measure(lambda: board.push(next(incoming)))))
+
+    boards = Leaderboards.from_snapshot(global_board_snapshot(entries), size)
+    results.append(("board", "Leaderboards.push", size, measure(lambda: boards.push(next(incoming)))))
+
+    ranks = ScoreRanks()
+    for entry in entries:
+        ranks.add(entry['percentage'])
+    scores = itertools.cycle([entry['percentage'] for entry in synthetic_results(1024, seed=5)])
+    results.append(("rank", "ScoreRanks.add", size, measure(lambda: ranks.add(next(scores)))))
+    results.append(("rank", "ScoreRanks.rank", size, measure(lambda: ranks.rank(next(scores)))))
+
+
+def bench_store(size, results):
+    entries = synthetic_results(size, seed=4)
+    snapshot = dict(global_board_snapshot(entries), generation=0)
+
+    workdir = tempfile.mkdtemp(prefix="trivia-micro-")
+    try:
+        path = os.path.join(workdir, "leaderboard.json")
+        with open(path, 'w') as f:
+            json.dump(snapshot, f)
+        store = LeaderboardStore(path, leaderboard_size=size)
+        store.load()
+        # Large boards take seconds per call; a couple of repeats is enough there
+        repeats = REPEATS if size <= 10000 else 2
+        results.append(("store", "save (compact)", size, measure(store.compact, repeats)))
+        results.append(("store", "load", size, measure(store.load, repeats)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_analytics(results):
+    bank = synthetic_bank(600)
+    rng = random.Random(4)
+    for n in (15, 1000):
+        questions = bank.sample("All", TYPES, n, seed=n)
+        answers = [
+            AnswerRecord(question.id, question.category, question.answer, rng.random() < 0.6, rng.uniform(1, 30))
+            for question in questions
+        ]
+        results.append(("analytics", "QuizStats.from_answers", n,
+                        measure(lambda: QuizStats.from_answers(answers, questions))))
+        try:
+            from charts import answers_fingerprint, build_figures
+        except ImportError:
+            continue
+        stats = QuizStats.from_answers(answers, questions)
+        results.append(("analytics", "answers_fingerprint", n, measure(lambda: answers_fingerprint(answers))))
+        results.append(("analytics", "build_figures", n, measure(lambda: build_figures(stats))))
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--banks", default="1000,100000,1000000", help="question bank sizes")
+    parser.add_argument("--boards", default="50,10000,1000000", help="leaderboard sizes")
+    parser.add_argument("--quick", action="store_true", help="only the smallest two sizes of each")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="show the ratio against results saved with --save")
+    args = parser.parse_args()
+
+    bank_sizes = [int(size) for size in args.banks.split(",")]
+    board_sizes = [int(size) for size in args.boards.split(",")]
+    if args.quick:
+        bank_sizes, board_sizes = bank_sizes[:2], board_sizes[:2]
+
+    results = []
+    for size in bank_sizes:
+        bench_bank(size, results)
+    bench_grading(results)
+    for size in board_sizes:
+        bench_board(size, results)
+        bench_store(size, results)
+    bench_analytics(results)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = {(row['group'], row['case'], row['size']): row['seconds'] for row in json.load(f)}
+
+    for group, case, size, seconds in results:
+        line = f"{group:>10}  {case:<30} {size:>9}  {format_time(seconds)}"
+        previous = baseline.get((group, case, size))
+        if previous:
+            line += f"   x{seconds / previous:5.2f} vs baseline"
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump([
+                {'group': group, 'case': case, 'size': size, 'seconds': seconds}
+                for group, case, size, seconds in results
+            ], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time-to-first-render of the quiz setup screen
+
+Each run starts a fresh Python process, so module imports (streamlit,
+plotly, pandas, ...) are part of the measurement, then renders app.py once
+with Streamlit's AppTest as a logged-in user sitting on the setup screen.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child process; prints timings as JSON
+CHILD = r"""
+import json, os, sys, time
+# `streamlit run` puts the script's folder on sys.path; AppTest does not
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[1])))
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.session_state["current_user"] = "benchmark"
+at.run()
+rendered = time.perf_counter()
+if at.exception:
+    raise SystemExit(f"app raised: {at.exception}")
+heavy = [m for m in ("pandas", "plotly") if m in sys.modules]
+print(json.dumps({
+    "import_streamlit": imported - start,
+    "first_render": rendered - imported,
+    "total": rendered - start,
+    "heavy_modules_loaded": heavy
+}))
+"""
+
+
+def run_once(app_path, workdir):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, app_path],
+        cwd=workdir, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    app_path = os.path.join(APP_DIR, "app.py")
+    # Run against a scratch copy of the leaderboard so the benchmark never touches real data
+    workdir = tempfile.mkdtemp(prefix="trivia-startup-")
+    try:
+        if os.path.exists(os.path.join(APP_DIR, "leaderboard.json")):
+            shutil.copy(os.path.join(APP_DIR, "leaderboard.json"), workdir)
+        runs = [run_once(app_path, workdir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for key in ("import_streamlit", "first_render", "total"):
+        values = [run[key] for run in runs]
+        print(f"{key:>18}: median {statistics.median(values) * 1000:8.1f} ms   "
+              f"min {min(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+    print(f"{'heavy modules':>18}: {runs[-1]['heavy_modules_loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Light color scheme
+LIGHT_COLORS = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8']
+
+# Figure cache bounds: entry count and total size of the cached figure JSON
+FIGURE_CACHE_ENTRIES = 256
+FIGURE_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def answers_fingerprint(answers):
+    """Hash of a quiz's answer records; equal answer sets produce equal figures"""
+    digest = hashlib.sha1()
+    for answer in answers:
+        digest.update(repr((
+            answer.question_id,
+            answer.user_answer,
+            bool(answer.is_correct),
+            round(answer.time_taken, 6)
+        )).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_figures(stats):
+    """Results-page charts for a quiz, as plain figure dicts keyed by chart name"""
+    light_colors = LIGHT_COLORS
+    question_numbers = list(range(1, stats.count + 1))
+    figures = {}
+
+    # Chart 1: Score progression with lighter colors
+    fig_progress = go.Figure()
+
+    # Add cumulative score line
+    fig_progress.add_trace(go.Scatter(
+        x=question_numbers, 
+        y=stats.cumulative_scores,
+        mode='lines+markers',
+        name='Cumulative Score',
+        line=dict(color=light_colors[0], width=4),
+        marker=dict(size=8, color=light_colors[0])
+    ))
+
+    # Add accuracy rate line
+    fig_progress.add_trace(go.Scatter(
+        x=question_numbers, 
+        y=stats.accuracy_rates,
+        mode='lines',
+        name='Accuracy Rate (%)',
+        line=dict(color=light_colors[1], width=3, dash='dash'),
+        yaxis='y2'
+    ))
+
+    fig_progress.update_layout(
+        title=dict(
+            text='Your Performance Throughout the Quiz',
+            font=dict(color='#000000', size=16, family='Arial')  # Very dark black
+        ),
+        xaxis=dict(
+            title=dict(text='Question Number', font=dict(color='#000000', size=14)),  # Very dark black
+            tickfont=dict(color='#000000', size=12)  # Very dark black
+        ),
+        yaxis=dict(
+            title=dict(text='Cumulative Score', font=dict(color='#000000', size=14)),  # Very dark black
+            tickfont=dict(color='#000000', size=12)  # Very dark black
+        ),
+        yaxis2=dict(
+            title=dict(text='Accuracy Rate (%)', font=dict(color='#000000', size=14)),  # Very dark black
+            overlaying='y',
+            side='right',
+            range=[0, 100],
+            tickfont=dict(color='#000000', size=12)  # Very dark black
+        ),
+        plot_bgcolor='rgba(255,255,255,0.9)',
+        paper_bgcolor='rgba(255,255,255,0.9)',
+        font=dict(color='#000000', size=12),  # Very dark black
+        showlegend=True,
+        legend=dict(
+            font=dict(color='#000000', size=12)  # Very dark black
+        )
+    )
+    figures['progress'] = fig_progress
+
+    # Chart 2: Performance by question type
+    if stats.by_type:
+        type_keys = sorted(stats.by_type)
+        fig_type = go.Figure(go.Bar(
+            x=[k.replace('_', ' ').title() for k in type_keys],
+            y=[round(stats.by_type[k].accuracy, 3) for k in type_keys],
+            marker=dict(color=[light_colors[i % len(light_colors)] for i in range(len(type_keys))])
+        ))
+        fig_type.update_layout(
+            xaxis=dict(
+                title=dict(text='Question Type', font=dict(color='#000000', size=12)),  # Very dark black
+                tickfont=dict(color='#000000', size=10)  # Very dark black
+            ),
+            yaxis=dict(
+                title=dict(text='Accuracy', font=dict(color='#000000', size=12)),  # Very dark black
+                tickfont=dict(color='#000000', size=10),  # Very dark black
+                tickformat='.0%', 
+                range=[0, 1]
+            ),
+            plot_bgcolor='rgba(255,255,255,0.9)',
+            paper_bgcolor='rgba(255,255,255,0.9)',
+            font=dict(color='#000000', size=10),  # Very dark black
+            showlegend=False,
+            height=400
+        )
+        figures['type'] = fig_type
+
+    # Chart 3: Performance by difficulty
+    if stats.by_difficulty:
+        difficulty_colors = {
+            'Easy': '#96CEB4',  # Green for Easy
+            'Medium': light_colors[2],  # Yellow for Medium
+            'Hard': light_colors[4]  # Red for Hard
+        }
+        difficulty_keys = sorted(stats.by_difficulty)
+        fig_difficulty = go.Figure(go.Pie(
+            labels=difficulty_keys,
+            values=[stats.by_difficulty[k].count for k in difficulty_keys],
+            marker=dict(colors=[difficulty_colors.get(k, light_colors[5]) for k in difficulty_keys])
+        ))
+        fig_difficulty.update_layout(
+            plot_bgcolor='rgba(255,255,255,0.9)',
+            paper_bgcolor='rgba(255,255,255,0.9)',
+            font=dict(color='#000000', size=10),  # Very dark black
+            legend=dict(
+                font=dict(color='#000000', size=10)  # Very dark black
+            ),
+            height=400
+        )
+        figures['difficulty'] = fig_difficulty
+
+    # Chart 4: Time analysis
+    # One trace per outcome, with marker area proportional to time (max marker size 20)
+    fig_time = go.Figure()
+    size_ref = 2.0 * max(stats.times) / (20 ** 2) if max(stats.times) > 0 else 1
+    for outcome in dict.fromkeys(stats.correctness):
+        points = [i for i, correct in enumerate(stats.correctness) if correct == outcome]
+        fig_time.add_trace(go.Scatter(
+            x=[question_numbers[i] for i in points],
+            y=[stats.times[i] for i in points],
+            mode='markers',
+            name=str(outcome),
+            marker=dict(
+                color=light_colors[1] if outcome else light_colors[0],
+                size=[stats.times[i] for i in points],
+                sizemode='area',
+                sizeref=size_ref
+            )
+        ))
+    fig_time.update_layout(
+        title=dict(
+            text='Time Spent per Question',
+            font=dict(color='#000000', size=16, family='Arial')  # Very dark black
+        ),
+        xaxis=dict(
+            title=dict(text='Question Number', font=dict(color='#000000', size=14)),  # Very dark black
+            tickfont=dict(color='#000000', size=12)  # Very dark black
+        ),
+        yaxis=dict(
+            title=dict(text='Time Taken (seconds)', font=dict(color='#000000', size=14)),  # Very dark black
+            tickfont=dict(color='#000000', size=12)  # Very dark black
+        ),
+        plot_bgcolor='rgba(255,255,255,0.9)',
+        paper_bgcolor='rgba(255,255,255,0.9)',
+        font=dict(color='#000000', size=12),  # Very dark black
+        legend=dict(
+            title=dict(text='Correct Answer', font=dict(color='#000000', size=12)),  # Very dark black
+            font=dict(color='#000000', size=11)  # Very dark black
+        )
+    )
+    figures['time'] = fig_time
+
+    return {name: fig.to_plotly_json() for name, fig in figures.items()}
+
+
+class FigureCache:
+    """LRU cache of built figures, stored as JSON and bounded by count and total size"""
+
+    def __init__(self, max_entries=FIGURE_CACHE_ENTRIES, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached figures for a key, or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(payload)
+
+    def put(self, key, figures):
+        """Cache figures under a key, evicting least recently used entries past the limits"""
+        payload = pio.json.to_json_plotly(figures)
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get_or_build(self, answers, stats):
+        """Figures for a quiz, built only on a cache miss"""
+        key = answers_fingerprint(answers)
+        figures = self.get(key)
+        if figures is None:
+            figures = build_figures(stats)
+            self.put(key, figures)
+            # Hand back the same JSON round-trip a cache hit would
+            figures = self.get(key) or figures
+        return figures
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
@@ -0,0 +1,90 @@
+import os
+import string
+import unicodedata
+
+# Words dropped when comparing free-text answers ("the Great" == "great")
+ARTICLES = frozenset({"a", "an", "the"})
+
+# Typos forgiven in fill-in-the-blank answers; 0 (the default) turns the fallback off
+FUZZY_DISTANCE = int(os.environ.get("TRIVIA_FUZZY_DISTANCE", 0))
+
+# Fast path for plain ASCII answers: the same punctuation rules as a translate table
+_ASCII_PUNCTUATION = str.maketrans({
+    char: " " if unicodedata.category(char) == "Pd" else None
+    for char in string.punctuation if unicodedata.category(char).startswith("P")
+})
+
+
+def normalize_answer(text):
+    """Canonical form of a free-text answer for comparison
+
+    Unicode-folds the text (accents removed, compatibility characters
+    expanded, case folded), removes punctuation (dashes become spaces),
+    drops the articles "a", "an" and "the" and collapses whitespace, so
+    "The Great." becomes "great" and "U.S.A." becomes "usa".
+    """
+    if text.isascii():
+        text = text.translate(_ASCII_PUNCTUATION)
+    else:
+        chars = []
+        for char in unicodedata.normalize("NFKD", text):
+            category = unicodedata.category(char)
+            if category.startswith("M"):
+                # Combining marks left over from decomposing accented letters
+                continue
+            if category == "Pd":
+                chars.append(" ")
+            elif not category.startswith("P"):
+                chars.append(char)
+        text = "".join(chars)
+    words = text.casefold().split()
+    # Drop articles, unless that would leave nothing (an answer of just "A")
+    stripped = [word for word in words if word not in ARTICLES]
+    return " ".join(stripped or words)
+
+
+def accepted_forms(answer, accept=()):
+    """Normalized forms a question accepts: its answer plus any listed synonyms"""
+    return frozenset(normalize_answer(text) for text in (answer, *accept))
+
+
+def within_distance(a, b, max_distance):
+    """Whether the Levenshtein distance between a and b is at most max_distance
+
+    Only a band of width 2 * max_distance + 1 around the diagonal is computed,
+    and the search stops as soon as every cell in a row exceeds the bound.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    if a == b:
+        return True
+    too_far = max_distance + 1
+    previous = [j if j <= max_distance else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, too_far)
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[len(b)] <= max_distance
+
+
+def matches(normalized, accepted, max_distance=0):
+    """Whether a normalized answer is accepted, exactly or within max_distance edits
+
+    Numbers are never matched fuzzily, so "1986" does not pass for "1985".
+    """
+    if normalized in accepted:
+        return True
+    if max_distance <= 0 or not normalized or normalized.isdigit():
+        return False
+    return any(
+        not form.isdigit() and within_distance(normalized, form, max_distance)
+        for form in accepted
+    )
@@ -0,0 +1,371 @@
+import bisect
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from background_writer import BackgroundWriter
+from quantile_sketch import ScoreDistributions
+from rank_index import RankIndex
+
+# Number of entries kept on the global leaderboard
+LEADERBOARD_SIZE = int(os.environ.get("TRIVIA_LEADERBOARD_SIZE", 50))
+
+# Board periods; "day" and "week" boards only hold results from the current period
+PERIODS = ("all_time", "week", "day")
+# Category of the board that holds every result
+ALL_CATEGORIES = "All"
+
+logger = logging.getLogger(__name__)
+
+
+def period_key(period, timestamp):
+    """Which day/week (or "all_time") an ISO timestamp falls in"""
+    if period == "all_time":
+        return "all_time"
+    moment = datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp
+    if period == "day":
+        return moment.date().isoformat()
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def leaderboard_key(entry):
+    """Sort key: percentage (descending) then time (ascending for same scores)"""
+    return (-entry['percentage'], entry['time_taken'])
+
+
+class TopK:
+    """Bounded leaderboard kept in rank order with bisect insertion
+
+    A result that cannot make the board is rejected by a single comparison
+    against the last entry; a qualifying one is placed with a binary search.
+    Equal keys keep arrival order, like a stable sort after appending.
+    """
+
+    def __init__(self, k=LEADERBOARD_SIZE, entries=()):
+        self.k = k
+        self._keys = []
+        self._entries = []
+        for entry in entries:
+            self.push(entry)
+
+    def qualifies(self, entry):
+        """Whether an entry would make the board"""
+        return len(self._keys) < self.k or leaderboard_key(entry) < self._keys[-1]
+
+    def push(self, entry):
+        """Insert an entry if it makes the board; returns True when inserted"""
+        key = leaderboard_key(entry)
+        if len(self._keys) >= self.k:
+            if not key < self._keys[-1]:
+                return False
+            self._keys.pop()
+            self._entries.pop()
+        i = bisect.bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._entries.insert(i, entry)
+        return True
+
+    def to_list(self):
+        """Entries in rank order"""
+        return list(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __getitem__(self, index):
+        return self._entries[index]
+
+
+class Leaderboards:
+    """Top-K boards per category and per period, updated incrementally
+
+    Every result is pushed into the "All" board and its own category's board
+    for each period, so a write touches at most six bounded boards and a read
+    never recomputes anything. When a result from a new day or week arrives,
+    the boards of the previous one are dropped.
+    """
+
+    def __init__(self, k=LEADERBOARD_SIZE):
+        self.k = k
+        # (category, period) -> TopK
+        self._boards = {}
+        # period -> day/week key the "day"/"week" boards currently hold
+        self._current = {}
+        # Score and pace percentiles across every result, not just the top k
+        self.distributions = ScoreDistributions()
+
+    def push(self, entry):
+        """Add a result to every board it belongs to"""
+        self.distributions.add(entry)
+        categories = {ALL_CATEGORIES, entry['category']}
+        for period in PERIODS:
+            key = period_key(period, entry['timestamp'])
+            current = self._current.get(period)
+            if current is not None and key < current:
+                # Result from an earlier day/week than the boards now hold
+                continue
+            if key != current:
+                self._current[period] = key
+                for board_key in [board_key for board_key in self._boards if board_key[1] == period]:
+                    del self._boards[board_key]
+            for category in categories:
+                board = self._boards.get((category, period))
+                if board is None:
+                    board = self._boards[(category, period)] = TopK(self.k)
+                board.push(entry)
+
+    def get(self, category=ALL_CATEGORIES, period="all_time", now=None):
+        """Board for a category and period (empty if nothing was recorded in it yet)"""
+        if self._current.get(period) != period_key(period, now or datetime.now()):
+            return TopK(self.k)
+        return self._boards.get((category, period)) or TopK(self.k)
+
+    def to_list(self):
+        """Serializable form of every board"""
+        return [
+            {
+                'category': category,
+                'period': period,
+                'period_key': self._current[period],
+                'entries': board.to_list()
+            }
+            for (category, period), board in self._boards.items()
+        ]
+
+    @classmethod
+    def from_snapshot(cls, snapshot, k=LEADERBOARD_SIZE):
+        """Restore boards from a snapshot; older files only have the global "leaderboard" list"""
+        boards = cls(k)
+        if 'boards' not in snapshot:
+            for entry in snapshot.get('leaderboard', []):
+                boards.push(entry)
+            # Only the top entries survive in old files, which would skew the percentiles upwards
+            boards.distributions = ScoreDistributions()
+            return boards
+        boards.distributions = ScoreDistributions.from_list(snapshot.get('distributions', []))
+        for board in snapshot['boards']:
+            boards._current[board['period']] = board['period_key']
+            boards._boards[(board['category'], board['period'])] = TopK(k, board['entries'])
+        return boards
+
+
+def update_user_stats(users, entry):
+    """Fold one quiz result into the {username: stats} dict"""
+    username = entry['username']
+    if username not in users:
+        users[username] = {
+            'total_quizzes': 0,
+            'total_score': 0,
+            'average_score': 0,
+            'best_score': 0,
+            'total_questions_answered': 0,
+            'total_time_spent': 0,
+            'first_quiz': entry['timestamp'],
+            'last_quiz': entry['timestamp']
+        }
+
+    user = users[username]
+    user['total_quizzes'] += 1
+    user['total_score'] += entry['percentage']
+    user['average_score'] = user['total_score'] / user['total_quizzes']
+    user['total_questions_answered'] += entry['total_questions']
+    user['total_time_spent'] += entry['time_taken']
+    user['last_quiz'] = entry['timestamp']
+
+    if entry['percentage'] > user['best_score']:
+        user['best_score'] = entry['percentage']
+
+
+def apply_result(users, boards, entry):
+    """Apply one quiz result to the user stats and leaderboards"""
+    update_user_stats(users, entry)
+    boards.push(entry)
+
+
+class LeaderboardSnapshot:
+    """Read-only view of one board at one version"""
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = entries
+
+
+class SharedLeaderboard:
+    """Process-wide leaderboard and user stats shared by every session
+
+    Writes go through ``record`` under a lock and bump ``version``. Readers
+    take a ``snapshot`` of one board, which is rebuilt at most once per
+    version, so every session sees results from the others without
+    re-reading the file. User stats live in ``user_store`` (a
+    ``user_stats.UserStatsStore``) and are read one user at a time.
+
+    With ``background=True`` results are written to the store and the user
+    database by a ``BackgroundWriter`` in coalesced batches, so ``record``
+    returns as soon as the boards are updated. Results still waiting to be
+    written are folded into ``user_stats`` so a player always sees them.
+
+    The log is the record of truth: a result is appended to it once, then
+    saved to the user database. Whatever fails stays queued and is retried
+    by the next write, so nothing already on the boards is lost or written
+    twice. Results that reached the log but not the database (a crash in
+    between) are saved when the next ``SharedLeaderboard`` starts; the
+    database skips result IDs it already has.
+
+    ``ranks`` places any result or player among everyone, not just the top
+    of the boards; it is rebuilt from the user database when not given.
+    """
+
+    def __init__(self, store, user_store, boards, background=False, ranks=None, **writer_options):
+        self._store = store
+        self._user_store = user_store
+        self._boards = boards
+        self._lock = threading.Lock()
+        self.version = 0
+        # (category, period, period key) -> LeaderboardSnapshot
+        self._snapshots = {}
+        # username -> results queued but not yet in the user database, oldest first
+        self._pending = {}
+        # Results not yet in the log, in record order (guarded by _users_lock)
+        self._unlogged = []
+        # Results in the log but not yet in the user database (only touched under _write_lock)
+        self._unsaved = []
+        self._users_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._catch_up()
+        self.ranks = ranks if ranks is not None else RankIndex.from_user_store(user_store)
+        self._writer = BackgroundWriter(self._write, **writer_options) if background else None
+
+    def _catch_up(self):
+        """Save logged results the user database is missing (from a failed write before a restart)"""
+        logged = [entry for entry in self._store.logged_results() if 'id' in entry]
+        added = self._user_store.record_many(logged) if logged else 0
+        if added:
+            logger.warning("Saved %d logged results that were missing from the user database", added)
+
+    def record(self, entry):
+        """Apply a quiz result to the boards in memory and save it (in the background if enabled)"""
+        self.record_many([entry])
+
+    def record_many(self, entries):
+        """Record several results, written together"""
+        with self._users_lock:
+            for entry in entries:
+                entry.setdefault('id', uuid.uuid4().hex)
+                self._add_pending(entry)
+                self._unlogged.append(entry)
+        with self._lock:
+            for entry in entries:
+                self._boards.push(entry)
+            self.version += 1
+        if self._writer is not None:
+            for entry in entries:
+                self._writer.submit(entry)
+        else:
+            self._write()
+
+    def _add_pending(self, entry):
+        """Queue a result for the user database and index it by rank (caller holds _users_lock)"""
+        stats = self._user_stats(entry['username'])
+        self.ranks.add_result(entry['percentage'], stats['best_score'] if stats else None)
+        self._pending.setdefault(entry['username'], []).append(entry)
+
+    def _write(self, batch=None):
+        """Save every queued result: one log append, then one user database transaction
+
+        ``batch`` (from the background writer) only signals that results are
+        waiting; everything queued is written, including results a failed
+        earlier attempt left behind. The log is compacted only once the
+        database has caught up, so compaction never drops unsaved results.
+        """
+        with self._write_lock:
+            with self._users_lock:
+                unlogged, self._unlogged = self._unlogged, []
+            if unlogged:
+                try:
+                    self._store.append_many(unlogged, compact=False)
+                except BaseException:
+                    with self._users_lock:
+                        self._unlogged[:0] = unlogged
+                    raise
+                self._unsaved.extend(unlogged)
+            if not self._unsaved:
+                return
+            with self._users_lock:
+                self._user_store.record_many(self._unsaved)
+                for entry in self._unsaved:
+                    pending = self._pending[entry['username']]
+                    pending.pop(0)
+                    if not pending:
+                        del self._pending[entry['username']]
+            self._unsaved = []
+            self._store.maybe_compact()
+
+    def flush(self):
+        """Wait until every recorded result is on disk (raises if results left by failed writes still fail)"""
+        if self._writer is not None:
+            self._writer.flush()
+        if self._unlogged or self._unsaved:
+            self._write()
+
+    def close(self):
+        """Write out queued results and stop the background writer"""
+        if self._writer is not None:
+            self._writer.close()
+        if self._unlogged or self._unsaved:
+            # Left behind by writes that failed; logged ones are saved at the next start anyway
+            try:
+                self._write()
+            except Exception:
+                logger.exception(
+                    "Could not save %d results (%d of them are in the log)",
+                    len(self._unlogged) + len(self._unsaved), len(self._unsaved)
+                )
+
+    def snapshot(self, category=ALL_CATEGORIES, period="all_time"):
+        """Entries of one board as of the latest version"""
+        cache_key = (category, period, period_key(period, datetime.now()))
+        snapshot = self._snapshots.get(cache_key)
+        if snapshot is None or snapshot.version != self.version:
+            with self._lock:
+                snapshot = LeaderboardSnapshot(self.version, tuple(self._boards.get(category, period)))
+                if len(self._snapshots) > 256:
+                    self._snapshots.clear()
+                self._snapshots[cache_key] = snapshot
+        return snapshot
+
+    def _user_stats(self, username):
+        stats = self._user_store.get(username)
+        pending = self._pending.get(username)
+        if not pending:
+            return stats
+        # Fold in results the background writer has not saved yet
+        users = {username: stats} if stats else {}
+        for entry in pending:
+            update_user_stats(users, entry)
+        return users[username]
+
+    def user_stats(self, username):
+        """Copy of a user's aggregate stats, or None if they have not finished a quiz"""
+        with self._users_lock:
+            return self._user_stats(username)
+
+    def result_rank(self, percentage):
+        """(rank, total) of a quiz score among every recorded result"""
+        return self.ranks.result_rank(percentage)
+
+    def percentiles(self, entry):
+        """(score beat %, pace beat %) of a recorded result among others of the same category and difficulty mix"""
+        return self._boards.distributions.beaten(entry)
+
+    def player_rank(self, username):
+        """(rank, total players) of a player by best score, or None if they have not finished a quiz"""
+        stats = self.user_stats(username)
+        if not stats:
+            return None
+        return self.ranks.player_rank(stats['best_score'])
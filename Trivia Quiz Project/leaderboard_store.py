@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from leaderboard import LEADERBOARD_SIZE, Leaderboards, apply_result
+from metrics import timed
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+# Fold the write-ahead log into the snapshot once it grows past this size
+COMPACT_BYTES = 256 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardStore:
+    """Leaderboard persistence as a JSON snapshot plus an append-only log of results
+
+    Each finished quiz appends one line to ``<path>.wal`` under an exclusive
+    file lock, so a write costs the same no matter how many users exist and
+    concurrent writers never interleave. Once the log passes ``compact_bytes``
+    it is folded into a new snapshot, written to a temporary file and
+    atomically renamed over ``<path>``.
+
+    The snapshot and the log both carry a generation number. Compaction bumps
+    the snapshot's generation before truncating the log, so a log left behind
+    by a crash between the two steps is recognised as already applied. A
+    partial last line left by a writer that crashed mid-append is cut off
+    before the log is read or appended to, and any other unreadable line is
+    skipped, so one bad line never hides the results after it. A result
+    logged twice under the same ``id`` (an append retried after a failed
+    fsync) is replayed once.
+
+    A failed compaction is logged rather than raised: the results it was
+    folding in are already safe in the log, which is compacted next time.
+    """
+
+    def __init__(self, path, compact_bytes=COMPACT_BYTES, leaderboard_size=LEADERBOARD_SIZE):
+        self.path = path
+        self.leaderboard_size = leaderboard_size
+        self.wal_path = path + ".wal"
+        self.lock_path = path + ".lock"
+        self.compact_bytes = compact_bytes
+        self._thread_lock = threading.Lock()
+        # Set when a compaction failed, possibly after replacing the snapshot but before resetting the log
+        self._check_generation = False
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _wal_generation(self):
+        if not os.path.exists(self.wal_path):
+            return None
+        with open(self.wal_path, 'r') as f:
+            header = f.readline()
+        return json.loads(header).get('generation', 0) if header.strip() else None
+
+    def _reset_wal(self, generation):
+        with open(self.wal_path, 'w') as f:
+            f.write(json.dumps({'generation': generation}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _truncate_torn_tail(self):
+        """Cut the log back to its last complete line so the next append starts on a fresh line"""
+        if not os.path.exists(self.wal_path):
+            return
+        with open(self.wal_path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            position = end
+            keep = 0
+            while position > 0:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                newline = f.read(step).rfind(b"\n")
+                if newline != -1:
+                    keep = position + newline + 1
+                    break
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_wal(self, generation):
+        """Result events in the log, or [] if the log predates the snapshot"""
+        wal_generation = self._wal_generation()
+        if wal_generation is None or wal_generation < generation:
+            return []
+        events = []
+        seen = set()
+        with open(self.wal_path, 'r') as f:
+            f.readline()
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # Unreadable line (e.g. torn by a crashed writer); the ones after it are still good
+                    continue
+                result_id = event.get('id')
+                if result_id is not None:
+                    if result_id in seen:
+                        continue
+                    seen.add(result_id)
+                events.append(event)
+        return events
+
+    def _read_state(self):
+        snapshot = self._read_snapshot()
+        users = snapshot.get('users', {})
+        boards = Leaderboards.from_snapshot(snapshot, self.leaderboard_size)
+        generation = snapshot.get('generation', 0)
+        for event in self._read_wal(generation):
+            apply_result(users, boards, event)
+        return users, boards, generation
+
+    def load(self):
+        """Load leaderboards (and legacy user stats): the snapshot plus every logged result since
+
+        User stats now live in ``user_stats.UserStatsStore``; the ones returned
+        here come from snapshots written before that and are only meant for
+        ``UserStatsStore.import_users``.
+        """
+        with self._locked():
+            self._truncate_torn_tail()
+            users, boards, generation = self._read_state()
+            self._ensure_wal(generation)
+        return users, boards
+
+    def logged_results(self):
+        """Results logged since the last compaction (used to catch the user database up after a failed write)"""
+        with self._locked():
+            self._truncate_torn_tail()
+            return self._read_wal(self._read_snapshot().get('generation', 0))
+
+    def _ensure_wal(self, generation=None):
+        """Start a fresh log if it is missing or was left behind by an interrupted compaction"""
+        if generation is None:
+            generation = self._read_snapshot().get('generation', 0)
+        wal_generation = self._wal_generation()
+        if wal_generation is None or wal_generation < generation:
+            self._reset_wal(generation)
+        self._check_generation = False
+
+    def append(self, entry):
+        """Durably log one quiz result"""
+        self.append_many([entry])
+
+    @timed("save_leaderboard")
+    def append_many(self, entries, compact=True):
+        """Durably log several quiz results with a single write and fsync
+
+        With ``compact=False`` the log is left to grow past its limit until
+        ``maybe_compact`` is called.
+        """
+        with self._locked():
+            self._truncate_torn_tail()
+            if self._check_generation or self._wal_generation() is None:
+                self._ensure_wal()
+            with open(self.wal_path, 'a') as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+                f.flush()
+                os.fsync(f.fileno())
+            if compact:
+                self._maybe_compact()
+
+    def maybe_compact(self):
+        """Fold the log into a fresh snapshot if it has grown past ``compact_bytes``"""
+        with self._locked():
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if not os.path.exists(self.wal_path) or os.path.getsize(self.wal_path) <= self.compact_bytes:
+            return
+        try:
+            self._compact()
+        except Exception:
+            logger.exception("Compacting %s failed; its results stay in the log", self.path)
+            self._check_generation = True
+
+    def compact(self):
+        """Fold the log into a fresh snapshot"""
+        with self._locked():
+            self._compact()
+
+    @timed("compact_leaderboard")
+    def _compact(self):
+        _, boards, generation = self._read_state()
+        data = {
+            'leaderboard': boards.get().to_list(),
+            'boards': boards.to_list(),
+            'distributions': boards.distributions.to_list(),
+            'generation': generation + 1,
+            'last_updated': datetime.now().isoformat()
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".leaderboard-", suffix=".tmp", dir=directory)
+        try:
+            os.chmod(tmp_path, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Safe even if we crash before this: the stale log's generation is now too old
+        self._reset_wal(generation + 1)
@@ -0,0 +1,174 @@
+import bisect
+import functools
+import hmac
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Secret that unlocks the timing panel when the app is opened with ?admin=<token>; unset disables it
+ADMIN_TOKEN = os.environ.get("TRIVIA_ADMIN_TOKEN", "")
+
+# Optional Prometheus textfile-collector path, rewritten at most every METRICS_FILE_INTERVAL seconds
+METRICS_FILE = os.environ.get("TRIVIA_METRICS_FILE")
+METRICS_FILE_INTERVAL = 15
+
+
+def is_admin(token):
+    """Whether a token from the URL matches TRIVIA_ADMIN_TOKEN (never true while it is unset)"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        # One count per bound plus the +Inf bucket; not cumulative until exported
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimated q-quantile, interpolated inside the bucket it falls in"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.bounds[i] if i < len(self.bounds) else self.max
+            if n and seen + n >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+            lower = upper
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self):
+        cumulative = []
+        total = 0
+        for n in self.counts:
+            total += n
+            cumulative.append(total)
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([str(bound) for bound in self.bounds] + ["+Inf"], cumulative))
+        }
+
+
+class MetricsRegistry:
+    """Process-wide timing histograms keyed by step name
+
+    Every Streamlit session runs in the same process, so one registry sees
+    the reruns of all of them. Recording takes a short lock; exporting copies
+    the histograms under the same lock.
+    """
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._last_file_write = float('-inf')
+
+    def observe(self, name, seconds):
+        """Record one duration for a step"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.bounds)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Time the body of a with block (recorded even if it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator that records every call of a function under ``name``"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """{step: summary dict} for every step recorded so far"""
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._started = time.time()
+
+    def to_json(self):
+        """JSON dump of every histogram"""
+        return json.dumps({'since': self._started, 'metrics': self.snapshot()}, indent=2)
+
+    def to_prometheus(self, metric="trivia_step_duration_seconds"):
+        """Prometheus text exposition format, one histogram labelled by step"""
+        lines = [
+            f"# HELP {metric} Time spent in instrumented app steps",
+            f"# TYPE {metric} histogram"
+        ]
+        for name, summary in self.snapshot().items():
+            for bound, count in summary['buckets'].items():
+                lines.append(f'{metric}_bucket{{step="{name}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_sum{{step="{name}"}} {summary["sum"]}')
+            lines.append(f'{metric}_count{{step="{name}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically write the Prometheus text to a file (node_exporter textfile collector)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def maybe_write_prometheus(self, path=METRICS_FILE, interval=METRICS_FILE_INTERVAL):
+        """Rewrite the metrics file if one is configured and the last write is old enough"""
+        if not path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_file_write < interval:
+                return
+            self._last_file_write = now
+        self.write_prometheus(path)
+
+
+REGISTRY = MetricsRegistry()
+timed = REGISTRY.timed
+timer = REGISTRY.timer
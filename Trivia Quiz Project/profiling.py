@@ -0,0 +1,60 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Profile every rerun when TRIVIA_PROFILE is set (the app also honours ?profile=1 with a valid ?admin= token)
+PROFILE_ENABLED = os.environ.get("TRIVIA_PROFILE", "") not in ("", "0")
+# Reports go here, relative to the working directory like leaderboard.json
+PROFILE_DIR = os.environ.get("TRIVIA_PROFILE_DIR", "profiles")
+# Functions listed per report, and reports kept before the oldest are deleted
+PROFILE_TOP = int(os.environ.get("TRIVIA_PROFILE_TOP", 30))
+PROFILE_KEEP = int(os.environ.get("TRIVIA_PROFILE_KEEP", 200))
+
+
+def write_report(profile, label, wall_time, directory=PROFILE_DIR, top=PROFILE_TOP, keep=PROFILE_KEEP):
+    """Write the top functions of one profiled run and drop the oldest reports past ``keep``"""
+    os.makedirs(directory, exist_ok=True)
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stream.write(f"{label}: {wall_time * 1000:.1f} ms wall, {stats.total_calls} calls\n")
+    stats.sort_stats("cumulative").print_stats(top)
+
+    # Timestamped names sort oldest first, which is what rotation relies on
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}-{label}.txt"
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        f.write(stream.getvalue())
+
+    reports = sorted(entry for entry in os.listdir(directory) if entry.endswith(".txt"))
+    for old in reports[:max(0, len(reports) - keep)]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            # Another session's rerun rotated it first
+            pass
+    return path
+
+
+@contextmanager
+def profiled(enabled, label="rerun"):
+    """Run the body under cProfile and write a report, or just run it when disabled"""
+    if not enabled:
+        yield
+        return
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is already active in this thread; run unprofiled
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        write_report(profile, label, time.perf_counter() - start)
@@ -0,0 +1,193 @@
+import bisect
+import math
+import random
+import threading
+
+# Accuracy/size trade-off of each sketch: rank error is roughly 1.7 / K, memory about 3 * K values
+SKETCH_K = 200
+
+
+class KLLSketch:
+    """KLL streaming quantile sketch (Karnin, Lang and Liberty, 2016)
+
+    Values go into level 0; when the sketch holds more than its capacity a
+    full level gives every other value (random offset) to the next level,
+    where each value counts twice as much. Memory stays O(k) however many
+    values are added, sketches with the same k can be merged, and the rank of
+    any value is estimated with a small, bounded error.
+
+    Every level is kept sorted, so ``rank`` is one binary search per level
+    and stays fast while values keep arriving.
+    """
+
+    def __init__(self, k=SKETCH_K, levels=None, count=0, rng=random):
+        self.k = k
+        self.levels = [sorted(values) for values in levels] if levels else [[]]
+        self.count = count
+        self._rng = rng
+        # (sorted values, cumulative weights) for quantile(), rebuilt lazily after an update
+        self._cdf = None
+        self._size = sum(len(values) for values in self.levels)
+        self._max_size = self._total_capacity()
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return int(math.ceil((2 / 3) ** depth * self.k)) + 1
+
+    def _total_capacity(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _compress(self):
+        for level in range(len(self.levels)):
+            values = self.levels[level]
+            if len(values) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+                self._max_size = self._total_capacity()
+            # An odd value out stays on this level
+            keep = [values.pop()] if len(values) % 2 else []
+            offset = 1 if self._rng.random() < 0.5 else 0
+            promoted = values[offset::2]
+            # Both runs are sorted, so this sort is a linear merge
+            above = self.levels[level + 1]
+            above.extend(promoted)
+            above.sort()
+            self._size -= len(values) - len(promoted)
+            self.levels[level] = keep
+            if self._size < self._max_size:
+                break
+
+    def add(self, value):
+        bisect.insort(self.levels[0], value)
+        self.count += 1
+        self._size += 1
+        self._cdf = None
+        if self._size >= self._max_size:
+            self._compress()
+
+    def merge(self, other):
+        """Fold another sketch (same k) into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, values in enumerate(other.levels):
+            self.levels[level].extend(values)
+            self.levels[level].sort()
+        self.count += other.count
+        self._size += other._size
+        self._max_size = self._total_capacity()
+        self._cdf = None
+        while self._size >= self._max_size:
+            self._compress()
+
+    def _cumulative(self):
+        if self._cdf is None:
+            weighted = sorted(
+                (value, 1 << level) for level, values in enumerate(self.levels) for value in values
+            )
+            cumulative = []
+            total = 0
+            for _, weight in weighted:
+                total += weight
+                cumulative.append(total)
+            self._cdf = ([value for value, _ in weighted], cumulative)
+        return self._cdf
+
+    def rank(self, value, inclusive=True):
+        """Estimated number of added values <= value (< value when not inclusive)"""
+        search = bisect.bisect_right if inclusive else bisect.bisect_left
+        return sum(search(values, value) << level for level, values in enumerate(self.levels))
+
+    def quantile(self, q):
+        """Estimated value at fraction q (0..1) of the added values, or None if empty"""
+        values, cumulative = self._cumulative()
+        if not values:
+            return None
+        i = bisect.bisect_left(cumulative, q * cumulative[-1])
+        return values[min(i, len(values) - 1)]
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'levels': [list(values) for values in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['k'], [list(values) for values in data['levels']], data['count'])
+
+
+class ScoreDistributions:
+    """Score and time-per-question sketches per (category, difficulty mix)
+
+    Answers "your score beat X% and your pace beat Y% of other results" for
+    quizzes like the player's, with bounded memory however many are played.
+    """
+
+    def __init__(self, k=SKETCH_K):
+        self.k = k
+        # (category, difficulty mix) -> (score sketch, seconds-per-question sketch)
+        self._sketches = {}
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        """Add a finished quiz (entries without a difficulty mix predate the sketches and are skipped)"""
+        mix = entry.get('difficulty_mix')
+        if mix is None or not entry['total_questions']:
+            return
+        key = (entry['category'], mix)
+        with self._lock:
+            sketches = self._sketches.get(key)
+            if sketches is None:
+                sketches = self._sketches[key] = (KLLSketch(self.k), KLLSketch(self.k))
+            sketches[0].add(entry['percentage'])
+            sketches[1].add(entry['time_taken'] / entry['total_questions'])
+
+    def beaten(self, entry):
+        """(score beat %, pace beat %) against other results of the same kind, or None if there are none"""
+        key = (entry['category'], entry.get('difficulty_mix'))
+        with self._lock:
+            sketches = self._sketches.get(key)
+            if sketches is None:
+                return None
+            scores, times = sketches
+            # The entry itself has usually been added already; leave it out of the comparison
+            others = scores.count - 1
+            if others < 1:
+                return None
+            lower_scores = scores.rank(entry['percentage'], inclusive=False)
+            slower = times.count - times.rank(entry['time_taken'] / entry['total_questions'])
+        return min(lower_scores / others, 1.0) * 100, min(slower / others, 1.0) * 100
+
+    def merge(self, other):
+        """Fold in the sketches of another ScoreDistributions (e.g. from another process)"""
+        for item in other.to_list():
+            key = (item['category'], item['difficulty_mix'])
+            incoming = (KLLSketch.from_dict(item['score']), KLLSketch.from_dict(item['time_per_question']))
+            with self._lock:
+                sketches = self._sketches.get(key)
+                if sketches is None:
+                    self._sketches[key] = incoming
+                else:
+                    sketches[0].merge(incoming[0])
+                    sketches[1].merge(incoming[1])
+
+    def to_list(self):
+        """Serializable form of every sketch"""
+        with self._lock:
+            return [
+                {
+                    'category': category,
+                    'difficulty_mix': mix,
+                    'score': scores.to_dict(),
+                    'time_per_question': times.to_dict()
+                }
+                for (category, mix), (scores, times) in self._sketches.items()
+            ]
+
+    @classmethod
+    def from_list(cls, items, k=SKETCH_K):
+        distributions = cls(k)
+        for item in items:
+            distributions._sketches[(item['category'], item['difficulty_mix'])] = (
+                KLLSketch.from_dict(item['score']),
+                KLLSketch.from_dict(item['time_per_question'])
+            )
+        return distributions
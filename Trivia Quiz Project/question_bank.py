@@ -0,0 +1,235 @@
+import bisect
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from itertools import product
+
+from grading import accepted_forms
+
+DEFAULT_TYPE = "multiple_choice"
+DEFAULT_DIFFICULTY = "Medium"
+
+# Question store layout: one JSONL shard per category plus a manifest with counts
+QUESTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions")
+MANIFEST_FILE = "manifest.json"
+
+
+def make_question_id(category, question_text):
+    """Stable ID derived from a question's category and text"""
+    digest = hashlib.sha1(f"{category}\x1f{question_text}".encode('utf-8')).hexdigest()
+    return f"{category[:3].lower()}-{digest[:10]}"
+
+
+def count_questions(questions):
+    """{type: {difficulty: count}} for a list of questions, as stored in the manifest"""
+    counts = {}
+    for q in questions:
+        by_difficulty = counts.setdefault(q.get('type', DEFAULT_TYPE), {})
+        difficulty = q.get('difficulty', DEFAULT_DIFFICULTY)
+        by_difficulty[difficulty] = by_difficulty.get(difficulty, 0) + 1
+    return counts
+
+
+def read_shard(path):
+    """Read one category shard (one JSON question per line)"""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                questions.append(json.loads(line))
+    return questions
+
+
+def rebuild_manifest(directory=QUESTIONS_DIR):
+    """Recount every shard listed in the manifest (run after editing question files)"""
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    for entry in manifest['categories'].values():
+        entry['counts'] = count_questions(read_shard(os.path.join(directory, entry['file'])))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    return manifest
+
+
+@dataclass(frozen=True, slots=True)
+class Question:
+    """One quiz question; category, type and difficulty strings are interned
+
+    Fill-in-the-blank questions also carry ``accepted``, the normalized forms
+    of their answer and of any synonyms listed under "accept" in the shard,
+    so grading is a set lookup.
+    """
+
+    id: str
+    category: str
+    question: str
+    answer: str
+    options: tuple = ()
+    explanation: str = ""
+    difficulty: str = DEFAULT_DIFFICULTY
+    type: str = DEFAULT_TYPE
+    accepted: frozenset = frozenset()
+
+    @classmethod
+    def from_dict(cls, data, category):
+        """Build a question from a shard row or legacy question dict"""
+        question_type = data.get('type', DEFAULT_TYPE)
+        return cls(
+            id=data.get('id') or make_question_id(category, data['question']),
+            category=sys.intern(category),
+            question=data['question'],
+            answer=data['answer'],
+            options=tuple(data.get('options', ())),
+            explanation=data.get('explanation', ""),
+            difficulty=sys.intern(data.get('difficulty', DEFAULT_DIFFICULTY)),
+            type=sys.intern(question_type),
+            accepted=(
+                accepted_forms(data['answer'], data.get('accept', ()))
+                if question_type == "fill_blank" else frozenset()
+            )
+        )
+
+
+class _CategoryIndex:
+    """Loaded questions of one category, indexed by type and difficulty"""
+
+    def __init__(self, category, questions):
+        # (type or None, difficulty or None) -> list of questions
+        self.index = {}
+        self.by_id = {}
+        for data in questions:
+            question = Question.from_dict(data, category)
+            self.by_id[question.id] = question
+            for key in product((question.type, None), (question.difficulty, None)):
+                self.index.setdefault(key, []).append(question)
+
+
+class QuestionBank:
+    """Question bank with precomputed indexes by category, type and difficulty
+
+    Counts come from the manifest, so they are available without reading any
+    questions. A category's shard is only read and indexed the first time a
+    quiz needs it.
+    """
+
+    def __init__(self, category_counts, load_category):
+        self._categories = list(category_counts.keys())
+        self._load_category = load_category
+        self._lock = threading.Lock()
+        # category -> _CategoryIndex, filled lazily
+        self._loaded = {}
+        # question ID -> question, for every loaded category
+        self._by_id = {}
+        # (category or None, type or None, difficulty or None) -> count
+        self._counts = Counter()
+        for category, by_type in category_counts.items():
+            for question_type, by_difficulty in by_type.items():
+                for difficulty, n in by_difficulty.items():
+                    for key in product((category, None), (question_type, None), (difficulty, None)):
+                        self._counts[key] += n
+
+    @classmethod
+    def from_directory(cls, directory=QUESTIONS_DIR):
+        """Bank backed by an on-disk question store (manifest plus JSONL shards)"""
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        entries = manifest['categories']
+
+        def load_category(category):
+            return read_shard(os.path.join(directory, entries[category]['file']))
+
+        return cls({name: entry['counts'] for name, entry in entries.items()}, load_category)
+
+    @classmethod
+    def from_dict(cls, questions_by_category):
+        """Bank over an in-memory {category: [question, ...]} mapping"""
+        counts = {category: count_questions(questions) for category, questions in questions_by_category.items()}
+        return cls(counts, lambda category: questions_by_category[category])
+
+    @property
+    def categories(self):
+        """Category names in their original order"""
+        return list(self._categories)
+
+    def _category_index(self, category):
+        index = self._loaded.get(category)
+        if index is None:
+            with self._lock:
+                index = self._loaded.get(category)
+                if index is None:
+                    index = _CategoryIndex(category, self._load_category(category))
+                    self._by_id.update(index.by_id)
+                    self._loaded[category] = index
+        return index
+
+    def load_all(self):
+        """Read every category's shard now instead of on first use"""
+        for category in self._categories:
+            self._category_index(category)
+
+    def get(self, question_id):
+        """Question for an ID, or None if it is not in a loaded category"""
+        return self._by_id.get(question_id)
+
+    def category_of(self, question_id):
+        """Category recorded for a question ID when its shard was loaded"""
+        question = self._by_id.get(question_id)
+        return question.category if question else "Unknown"
+
+    def count(self, category=None, question_type=None, difficulty=None):
+        """Number of questions matching the given filters (None matches everything)"""
+        if category == "All":
+            category = None
+        return self._counts.get((category, question_type, difficulty), 0)
+
+    def buckets(self, category, question_types, difficulty=None):
+        """Index lists holding the questions for a category ("All" for every category) and types"""
+        if category == "All":
+            categories = self._categories
+        elif category in self._categories:
+            categories = [category]
+        else:
+            return []
+        result = []
+        for cat in categories:
+            if not any(self.count(cat, question_type, difficulty) for question_type in question_types):
+                continue
+            index = self._category_index(cat)
+            for question_type in question_types:
+                bucket = index.index.get((question_type, difficulty))
+                if bucket:
+                    result.append(bucket)
+        return result
+
+    def sample(self, category, question_types, k, seed=None, difficulty=None):
+        """Draw up to k distinct questions without copying the candidate set
+
+        Positions are sampled from the combined length of the matching index
+        buckets and mapped back to their bucket, so memory is O(k) regardless
+        of how many questions match. Passing a seed makes the draw reproducible.
+        """
+        buckets = self.buckets(category, question_types, difficulty)
+        offsets = []
+        total = 0
+        for bucket in buckets:
+            offsets.append(total)
+            total += len(bucket)
+        rng = random.Random(seed) if seed is not None else random
+        picked = []
+        for position in rng.sample(range(total), min(k, total)):
+            i = bisect.bisect_right(offsets, position) - 1
+            picked.append(buckets[i][position - offsets[i]])
+        return picked
+
+
+if __name__ == "__main__":
+    # Recount the shards after adding or editing questions
+    rebuild_manifest(sys.argv[1] if len(sys.argv) > 1 else QUESTIONS_DIR)
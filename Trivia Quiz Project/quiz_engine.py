@@ -0,0 +1,162 @@
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from analytics import QuizStats
+from grading import FUZZY_DISTANCE, matches, normalize_answer
+
+
+@dataclass(slots=True)
+class AnswerRecord:
+    """One submitted answer; question text and explanation stay on the Question"""
+
+    question_id: str
+    category: str
+    user_answer: str
+    is_correct: bool
+    time_taken: float
+
+
+def result_entry(username, score, total_questions, time_taken, category, timestamp, difficulty_mix="Medium"):
+    """Leaderboard entry for a finished quiz (what ``SharedLeaderboard.record`` consumes)
+
+    ``id`` is unique per result, so the same result saved twice is recognised.
+    """
+    now = datetime.fromtimestamp(timestamp)
+    return {
+        'id': uuid.uuid4().hex,
+        'username': username,
+        'score': score,
+        'total_questions': total_questions,
+        'percentage': score / total_questions * 100,
+        'time_taken': time_taken,
+        'category': category,
+        'difficulty_mix': difficulty_mix,
+        'timestamp': now.isoformat(),
+        'date': now.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+class QuizSession:
+    """State of one player's quiz, independent of any UI"""
+
+    def __init__(self, username, category, questions, started_at):
+        self.username = username
+        self.category = category
+        self.questions = questions
+        self.current = 0
+        self.score = 0
+        self.answers = []
+        self.stats = QuizStats()
+        self.start_time = started_at
+        self.question_start_time = started_at
+        self.answer_submitted = False
+        # Leaderboard entry, set once the quiz is finished
+        self.result = None
+
+    @property
+    def total_questions(self):
+        return len(self.questions)
+
+    @property
+    def current_question(self):
+        return self.questions[self.current]
+
+    @property
+    def is_last_question(self):
+        return self.current >= len(self.questions) - 1
+
+    @property
+    def finished(self):
+        return self.result is not None
+
+
+class QuizEngine:
+    """Quiz flow (start, grade, advance, finish) as plain Python
+
+    The Streamlit app is a thin adapter over this class; tests and load tools
+    can drive thousands of sessions without a script run. ``leaderboard`` is
+    anything with a ``record(entry)`` method, or None to skip recording.
+    """
+
+    def __init__(self, bank, leaderboard=None, clock=time.time, fuzzy_distance=FUZZY_DISTANCE):
+        self.bank = bank
+        self.leaderboard = leaderboard
+        self.clock = clock
+        # Typos forgiven in fill-in-the-blank answers (0 = exact normalized match only)
+        self.fuzzy_distance = fuzzy_distance
+
+    def start(self, username, category, num_questions, question_types, seed=None):
+        """Start a new quiz with selected settings; raises ValueError if it cannot start"""
+        if not username:
+            raise ValueError("Please enter a username first!")
+        questions = self.bank.sample(category, question_types, num_questions, seed=seed)
+        if not questions:
+            raise ValueError("No questions available for the selected category and question types!")
+        return QuizSession(username, category, questions, self.clock())
+
+    @staticmethod
+    def grade(question, user_answer, fuzzy_distance=0):
+        """(is_correct, normalized user answer, correct answer) for one answer"""
+        # Free text is normalized once and looked up in the question's precompiled accepted forms
+        if question.type == "fill_blank":
+            user_answer = normalize_answer(user_answer)
+            return matches(user_answer, question.accepted, fuzzy_distance), user_answer, question.answer
+        return user_answer == question.answer, user_answer, question.answer
+
+    def submit(self, session, user_answer):
+        """Grade the current question, update the score and return the answer record
+
+        Raises ValueError if the current question has already been answered,
+        so a repeated submit can never count one question twice.
+        """
+        if session.answer_submitted:
+            raise ValueError("This question has already been answered!")
+        question = session.current_question
+        is_correct, user_answer, _ = self.grade(question, user_answer, self.fuzzy_distance)
+
+        # Store user's answer with time tracking; the record points at the question by ID
+        answer_record = AnswerRecord(
+            question_id=question.id,
+            category=question.category,
+            user_answer=user_answer,
+            is_correct=is_correct,
+            time_taken=self.clock() - session.question_start_time
+        )
+        session.answers.append(answer_record)
+        session.stats.add(answer_record, question)
+        if is_correct:
+            session.score += 1
+        session.answer_submitted = True
+        return answer_record
+
+    def next_question(self, session):
+        """Move to the next question; returns False on the last one"""
+        if session.is_last_question:
+            return False
+        session.current += 1
+        session.answer_submitted = False
+        session.question_start_time = self.clock()
+        return True
+
+    def finish(self, session):
+        """Score the quiz and record it on the leaderboard (only the first call records)"""
+        if session.result is None:
+            now = self.clock()
+            session.result = result_entry(
+                session.username,
+                session.score,
+                session.total_questions,
+                now - session.start_time,
+                session.category,
+                now,
+                session.stats.difficulty_mix
+            )
+            self.update_leaderboard(session.result)
+        return session.result
+
+    def update_leaderboard(self, entry):
+        """Record a finished quiz on the shared leaderboard"""
+        if self.leaderboard is not None:
+            self.leaderboard.record(entry)
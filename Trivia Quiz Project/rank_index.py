@@ -0,0 +1,119 @@
+import threading
+
+# Scores are percentages bucketed to 0.1%, so 0.0 .. 100.0 maps to 1001 buckets
+BUCKETS_PER_POINT = 10
+BUCKET_COUNT = 100 * BUCKETS_PER_POINT + 1
+
+
+def score_bucket(percentage):
+    """Bucket of a percentage score (clamped to 0..100), rounding halves up like SQLite's ROUND"""
+    return min(max(int(percentage * BUCKETS_PER_POINT + 0.5), 0), BUCKET_COUNT - 1)
+
+
+class FenwickTree:
+    """Binary indexed tree of counts: point updates and prefix sums in O(log n)"""
+
+    __slots__ = ('_tree',)
+
+    def __init__(self, size):
+        self._tree = [0] * (size + 1)
+
+    @classmethod
+    def from_counts(cls, counts):
+        """Tree over an existing list of counts, built in O(n)"""
+        tree = cls(len(counts))
+        data = tree._tree
+        for i, count in enumerate(counts, start=1):
+            data[i] += count
+            parent = i + (i & -i)
+            if parent < len(data):
+                data[parent] += data[i]
+        return tree
+
+    def add(self, index, delta):
+        i = index + 1
+        data = self._tree
+        while i < len(data):
+            data[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index):
+        """Sum of counts at positions 0..index"""
+        total = 0
+        i = index + 1
+        data = self._tree
+        while i > 0:
+            total += data[i]
+            i -= i & -i
+        return total
+
+
+class ScoreRanks:
+    """Count of scores per 0.1% bucket, answering "#rank of total" in O(log buckets)
+
+    Rank is one plus the number of scores in strictly higher buckets, so equal
+    scores share a rank, as on a sports table.
+    """
+
+    def __init__(self, counts=None):
+        counts = list(counts) if counts is not None else [0] * BUCKET_COUNT
+        self._counts = counts
+        self._tree = FenwickTree.from_counts(counts)
+        self.total = sum(counts)
+
+    def add(self, percentage, count=1):
+        bucket = score_bucket(percentage)
+        self._counts[bucket] += count
+        self._tree.add(bucket, count)
+        self.total += count
+
+    def remove(self, percentage):
+        self.add(percentage, -1)
+
+    def rank(self, percentage):
+        """(rank, total) a score would have among the indexed scores"""
+        higher = self.total - self._tree.prefix_sum(score_bucket(percentage))
+        return higher + 1, self.total
+
+
+class RankIndex:
+    """Global ranks across every recorded result and every player's best score
+
+    ``results`` indexes the percentage of each finished quiz; ``players``
+    indexes one best score per player and is moved when a player beats it.
+    Both are rebuilt from the user database at startup with two grouped
+    queries, then kept up to date by ``SharedLeaderboard.record``.
+    """
+
+    def __init__(self, results=None, players=None):
+        self.results = results or ScoreRanks()
+        self.players = players or ScoreRanks()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_user_store(cls, user_store):
+        """Index over everything in a ``user_stats.UserStatsStore``"""
+        return cls(
+            ScoreRanks(user_store.score_histogram(BUCKETS_PER_POINT, BUCKET_COUNT)),
+            ScoreRanks(user_store.best_score_histogram(BUCKETS_PER_POINT, BUCKET_COUNT))
+        )
+
+    def add_result(self, percentage, previous_best=None):
+        """Index a new result; ``previous_best`` is the player's best before it (None if first quiz)"""
+        with self._lock:
+            self.results.add(percentage)
+            if previous_best is None:
+                self.players.add(percentage)
+            elif percentage > previous_best:
+                self.players.remove(previous_best)
+                self.players.add(percentage)
+
+    def result_rank(self, percentage):
+        """(rank, total results) of a quiz result"""
+        with self._lock:
+            return self.results.rank(percentage)
+
+    def player_rank(self, best_score):
+        """(rank, total players) of a player with this best score"""
+        with self._lock:
+            return self.players.rank(best_score)
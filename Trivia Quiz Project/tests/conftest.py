@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules sit side by side in the project folder, like under `streamlit run app.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
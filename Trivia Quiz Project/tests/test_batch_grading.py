@@ -0,0 +1,43 @@
+import pytest
+
+from batch_grading import BatchGrader, read_sheets
+from question_bank import QuestionBank
+
+
+@pytest.fixture(scope="module")
+def grader():
+    return BatchGrader(QuestionBank.from_directory(), clock=lambda: 1_700_000_000)
+
+
+@pytest.fixture(scope="module")
+def question(grader):
+    return grader.bank.sample("All", ["multiple_choice"], 1, seed=0)[0]
+
+
+def test_repeated_answer_counts_once(grader, question):
+    rows = [("alice", question.id, question.answer, 1.0)] * 3
+    result = grader.grade(rows)
+    entry, = result.entries
+    assert (entry['score'], entry['total_questions']) == (1, 1)
+    assert [row for row, _ in result.errors] == [2, 3]
+
+
+@pytest.mark.parametrize("time_taken", ["nan", "inf", "-50", "soon"])
+def test_bad_time_taken_is_reported(grader, question, time_taken):
+    result = grader.grade([("alice", question.id, question.answer, time_taken)])
+    assert result.entries == []
+    assert result.errors == [(1, f"bad time_taken {time_taken!r}")]
+
+
+def test_missing_csv_column_is_named(tmp_path):
+    path = tmp_path / "sheets.csv"
+    path.write_text("user,question_id\nalice,x\n")
+    with pytest.raises(ValueError, match="answer"):
+        list(read_sheets(str(path)))
+
+
+def test_jsonl_line_must_be_an_object(tmp_path):
+    path = tmp_path / "sheets.jsonl"
+    path.write_text('{"user": "alice", "question_id": "x", "answer": "y"}\n[1, 2]\n')
+    with pytest.raises(ValueError, match="line 2 is not a JSON object"):
+        list(read_sheets(str(path)))
@@ -0,0 +1,42 @@
+import itertools
+import random
+
+import pytest
+
+from grading import matches, normalize_answer, within_distance
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def test_banded_check_agrees_with_full_levenshtein():
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abc") for _ in range(rng.randrange(7))) for _ in range(60)]
+    for a, b in itertools.product(words, repeat=2):
+        distance = levenshtein(a, b)
+        for max_distance in range(4):
+            assert within_distance(a, b, max_distance) == (distance <= max_distance), (a, b, max_distance)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("The Great.", "great"),
+    ("U.S.A.", "usa"),
+    ("Café", "cafe"),
+    ("Jean-Paul", "jean paul"),
+    ("A", "a"),
+])
+def test_normalize_answer(text, expected):
+    assert normalize_answer(text) == expected
+
+
+def test_numbers_are_never_fuzzy():
+    assert not matches("1986", {"1985"}, max_distance=1)
+    assert matches("parris", {"paris"}, max_distance=1)
+    assert not matches("parris", {"paris"})
@@ -0,0 +1,108 @@
+import json
+import shutil
+
+from leaderboard_store import LeaderboardStore
+
+
+def make_entry(username, percentage, time_taken=10.0):
+    return {
+        'username': username,
+        'score': int(percentage // 10),
+        'total_questions': 10,
+        'percentage': percentage,
+        'time_taken': time_taken,
+        'category': "Science",
+        'difficulty_mix': "Medium",
+        'timestamp': "2026-10-17T12:00:00",
+        'date': "2026-10-17 12:00:00"
+    }
+
+
+def usernames(boards):
+    return sorted(entry['username'] for entry in boards.get("All", "all_time", now="2026-10-17T18:00:00"))
+
+
+def test_results_survive_reload_and_compaction(tmp_path):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"))
+    store.load()
+    store.append_many([make_entry("alice", 80.0), make_entry("bob", 70.0)])
+    store.append(make_entry("carol", 60.0))
+
+    _, boards = store.load()
+    assert usernames(boards) == ["alice", "bob", "carol"]
+
+    store.compact()
+    _, boards = LeaderboardStore(store.path).load()
+    assert usernames(boards) == ["alice", "bob", "carol"]
+    assert boards.distributions.beaten(make_entry("alice", 80.0)) is not None
+
+
+def test_torn_line_does_not_hide_later_results(tmp_path):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"))
+    store.load()
+    store.append(make_entry("alice", 80.0))
+    # A writer crashed halfway through its line
+    with open(store.wal_path, 'a') as f:
+        f.write('{"username": "crashed", "perc')
+    for name in ("bob", "carol", "dave"):
+        store.append(make_entry(name, 70.0))
+
+    _, boards = store.load()
+    assert usernames(boards) == ["alice", "bob", "carol", "dave"]
+
+    store.compact()
+    _, boards = store.load()
+    assert usernames(boards) == ["alice", "bob", "carol", "dave"]
+
+
+def test_torn_tail_is_cut_on_load(tmp_path):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"))
+    store.load()
+    store.append(make_entry("alice", 80.0))
+    with open(store.wal_path, 'a') as f:
+        f.write('{"username": "crashed"')
+
+    store.load()
+    with open(store.wal_path) as f:
+        assert f.read().endswith("\n")
+
+
+def test_unreadable_line_in_the_middle_is_skipped(tmp_path):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"))
+    store.load()
+    store.append(make_entry("alice", 80.0))
+    with open(store.wal_path, 'a') as f:
+        f.write("not json\n")
+    store.append(make_entry("bob", 70.0))
+
+    _, boards = store.load()
+    assert usernames(boards) == ["alice", "bob"]
+
+
+def test_stale_log_from_interrupted_compaction_is_not_replayed(tmp_path):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"))
+    store.load()
+    store.append_many([make_entry("alice", 80.0), make_entry("bob", 70.0)])
+    stale_log = str(tmp_path / "stale.wal")
+    shutil.copy(store.wal_path, stale_log)
+
+    store.compact()
+    # Crash after the snapshot was replaced but before the log was reset
+    shutil.copy(stale_log, store.wal_path)
+
+    _, boards = store.load()
+    assert usernames(boards) == ["alice", "bob"]
+    with open(store.wal_path) as f:
+        assert json.loads(f.readline())['generation'] == 1
+
+
+def test_log_compacts_past_size_limit(tmp_path):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"), compact_bytes=1024)
+    store.load()
+    for i in range(20):
+        store.append(make_entry(f"user{i}", float(i)))
+
+    with open(store.path) as f:
+        assert json.load(f)['generation'] >= 1
+    _, boards = store.load()
+    assert len(usernames(boards)) == 20
@@ -0,0 +1,76 @@
+import bisect
+import random
+
+from quantile_sketch import KLLSketch, ScoreDistributions
+
+
+def exact_rank(sorted_values, value):
+    return bisect.bisect_right(sorted_values, value)
+
+
+def filled_sketch(values, seed=0):
+    sketch = KLLSketch(rng=random.Random(seed))
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_rank_error_is_small():
+    rng = random.Random(1)
+    values = [rng.random() for _ in range(50_000)]
+    sketch = filled_sketch(values)
+    values.sort()
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert abs(sketch.rank(q) - exact_rank(values, q)) / len(values) < 0.02
+    assert abs(sketch.quantile(0.5) - 0.5) < 0.02
+    assert sketch.count == len(values)
+
+
+def test_memory_stays_bounded_and_levels_stay_sorted():
+    sketch = filled_sketch(random.Random(2).random() for _ in range(100_000))
+    assert sum(len(values) for values in sketch.levels) < 4 * sketch.k
+    assert all(values == sorted(values) for values in sketch.levels)
+
+
+def test_small_sketch_is_exact():
+    sketch = filled_sketch([3, 1, 2, 2])
+    assert sketch.rank(2) == 3
+    assert sketch.rank(2, inclusive=False) == 1
+    assert sketch.rank(0) == 0
+
+
+def test_merge_and_round_trip():
+    rng = random.Random(3)
+    left = [rng.random() for _ in range(20_000)]
+    right = [rng.random() + 1 for _ in range(20_000)]
+    merged = filled_sketch(left, seed=4)
+    merged.merge(filled_sketch(right, seed=5))
+    assert merged.count == 40_000
+    assert abs(merged.rank(1.0) - 20_000) / 40_000 < 0.02
+
+    restored = KLLSketch.from_dict(merged.to_dict())
+    assert restored.rank(1.0) == merged.rank(1.0)
+
+
+def result(percentage, seconds_per_question, mix="Medium"):
+    return {
+        'category': "Science",
+        'difficulty_mix': mix,
+        'percentage': percentage,
+        'total_questions': 10,
+        'time_taken': seconds_per_question * 10
+    }
+
+
+def test_beaten_compares_against_other_results_of_the_same_kind():
+    distributions = ScoreDistributions()
+    for percentage in (10, 20, 30, 40):
+        distributions.add(result(percentage, 10))
+    mine = result(50, 5)
+    distributions.add(mine)
+    distributions.add(result(90, 1, mix="Hard"))
+
+    assert distributions.beaten(mine) == (100.0, 100.0)
+    assert distributions.beaten(result(10, 10)) == (0.0, 0.0)
+    assert distributions.beaten(result(90, 1, mix="Hard")) is None
+    assert ScoreDistributions.from_list(distributions.to_list()).beaten(mine) == (100.0, 100.0)
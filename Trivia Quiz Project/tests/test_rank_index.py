@@ -0,0 +1,67 @@
+import random
+
+from rank_index import BUCKET_COUNT, FenwickTree, RankIndex, ScoreRanks, score_bucket
+from user_stats import UserStatsStore
+
+
+def test_fenwick_prefix_sums_match_a_plain_list():
+    rng = random.Random(0)
+    counts = [rng.randint(0, 5) for _ in range(257)]
+    tree = FenwickTree.from_counts(counts)
+    for _ in range(200):
+        index = rng.randrange(len(counts))
+        delta = rng.randint(-2, 3)
+        counts[index] += delta
+        tree.add(index, delta)
+    for index in range(len(counts)):
+        assert tree.prefix_sum(index) == sum(counts[:index + 1])
+
+
+def test_score_bucket_rounds_half_up_and_clamps():
+    assert score_bucket(66.65) == 667
+    assert score_bucket(-3) == 0
+    assert score_bucket(250) == BUCKET_COUNT - 1
+
+
+def test_equal_scores_share_a_rank():
+    ranks = ScoreRanks()
+    for percentage in (90, 80, 80, 50):
+        ranks.add(percentage)
+    assert ranks.rank(90) == (1, 4)
+    assert ranks.rank(80) == (2, 4)
+    assert ranks.rank(50) == (4, 4)
+    assert ranks.rank(100) == (1, 4)
+
+
+def test_player_index_moves_only_when_a_best_is_beaten():
+    index = RankIndex()
+    index.add_result(70)
+    index.add_result(60)
+    index.add_result(65, previous_best=70)
+    index.add_result(80, previous_best=60)
+    assert index.players.total == 2
+    assert index.player_rank(80) == (1, 2)
+    assert index.player_rank(70) == (2, 2)
+    assert index.result_rank(66) == (3, 4)
+
+
+def test_rebuilt_index_matches_the_incremental_one(tmp_path):
+    user_store = UserStatsStore(str(tmp_path / "users.db"))
+    incremental = RankIndex()
+    rng = random.Random(1)
+    best = {}
+    for i in range(300):
+        username = f"user{rng.randrange(40)}"
+        percentage = rng.randrange(11) * 10 / rng.choice((1, 3, 7))
+        incremental.add_result(percentage, best.get(username))
+        best[username] = max(best.get(username, percentage), percentage)
+        user_store.record({
+            'id': str(i), 'username': username, 'score': 0, 'total_questions': 10,
+            'percentage': percentage, 'time_taken': 1.0, 'category': "Science",
+            'timestamp': "2026-10-17T12:00:00"
+        })
+
+    rebuilt = RankIndex.from_user_store(user_store)
+    for percentage in (0, 14.3, 33.3, 50, 100):
+        assert rebuilt.result_rank(percentage) == incremental.result_rank(percentage)
+        assert rebuilt.player_rank(percentage) == incremental.player_rank(percentage)
@@ -0,0 +1,151 @@
+import sqlite3
+
+import pytest
+
+from leaderboard import SharedLeaderboard
+from leaderboard_store import LeaderboardStore
+from quiz_engine import result_entry
+from user_stats import UserStatsStore
+
+NOW = 1_700_000_000
+
+
+class FlakyWrites:
+    """Makes a write method fail a number of times (or always) before passing calls through"""
+
+    def __init__(self, write, failures):
+        self._write = write
+        self.failures = failures
+
+    def __call__(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("disk I/O error")
+        return self._write(*args, **kwargs)
+
+
+def entry(username, score, time_taken=10.0):
+    return result_entry(username, score, 10, time_taken, "Science", NOW)
+
+
+def logged_ids(store):
+    with open(store.wal_path) as f:
+        f.readline()
+        return [line for line in f if line.strip()]
+
+
+def open_leaderboard(tmp_path, background=False, **options):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"))
+    _, boards = store.load()
+    user_store = UserStatsStore(str(tmp_path / "users.db"))
+    leaderboard = SharedLeaderboard(store, user_store, boards, background=background, interval=0.01, **options)
+    return store, user_store, leaderboard
+
+
+def test_failed_database_write_is_retried_without_logging_twice(tmp_path):
+    store, user_store, leaderboard = open_leaderboard(tmp_path, background=True)
+    user_store.record_many = FlakyWrites(user_store.record_many, failures=1)
+
+    leaderboard.record(entry("alice", 8))
+    leaderboard.flush()
+
+    assert len(logged_ids(store)) == 1
+    assert user_store.get("alice")['total_quizzes'] == 1
+    leaderboard.close()
+
+
+def test_results_stay_consistent_while_the_database_is_down(tmp_path):
+    store, user_store, leaderboard = open_leaderboard(tmp_path, background=True)
+    leaderboard.record(entry("alice", 8))
+    leaderboard.flush()
+    user_store.record_many = FlakyWrites(user_store.record_many, failures=float("inf"))
+
+    leaderboard.record(entry("alice", 9))
+    leaderboard.record(entry("bob", 5))
+    leaderboard._writer.flush()
+
+    assert leaderboard.snapshot().entries[0]['percentage'] == 90.0
+    assert leaderboard.user_stats("alice")['best_score'] == 90.0
+    assert leaderboard.result_rank(0.0) == (4, 3)
+    assert leaderboard.player_rank("alice") == (1, 2)
+    assert len(logged_ids(store)) == 3
+    leaderboard.close()
+    user_store.close()
+
+    # After a restart the user database catches up from the log, once
+    _, user_store, leaderboard = open_leaderboard(tmp_path)
+    assert user_store.get("alice")['total_quizzes'] == 2
+    assert user_store.get("bob")['total_quizzes'] == 1
+    assert leaderboard.result_rank(0.0) == (4, 3)
+    _, user_store_again, _ = open_leaderboard(tmp_path)
+    assert user_store_again.get("alice")['total_quizzes'] == 2
+
+
+def test_failed_writes_are_retried_by_the_next_one(tmp_path):
+    store, user_store, leaderboard = open_leaderboard(tmp_path)
+    store.append_many = FlakyWrites(store.append_many, failures=1)
+
+    with pytest.raises(sqlite3.OperationalError):
+        leaderboard.record(entry("alice", 8))
+    leaderboard.record(entry("bob", 5))
+
+    assert len(logged_ids(store)) == 2
+    assert user_store.get("alice")['total_quizzes'] == 1
+    assert leaderboard._pending == {}
+
+
+def test_failed_compaction_does_not_fail_or_repeat_the_append(tmp_path, monkeypatch):
+    store, user_store, leaderboard = open_leaderboard(tmp_path)
+    store.compact_bytes = 0
+    compact = store._compact
+    monkeypatch.setattr(store, "_compact", FlakyWrites(compact, failures=1))
+
+    leaderboard.record(entry("alice", 8))
+    assert len(logged_ids(store)) == 1
+    assert user_store.get("alice")['total_quizzes'] == 1
+
+    # The next write compacts, and the snapshot still holds the first result
+    leaderboard.record(entry("bob", 5))
+    assert logged_ids(store) == []
+    _, boards = store.load()
+    assert [e['username'] for e in boards.get()] == ["alice", "bob"]
+
+
+def test_result_logged_twice_is_replayed_once(tmp_path):
+    store = LeaderboardStore(str(tmp_path / "leaderboard.json"))
+    store.load()
+    result = entry("alice", 8)
+    store.append(result)
+    store.append(result)
+
+    _, boards = store.load()
+    assert len(boards.get()) == 1
+    assert boards.distributions.beaten(result) is None
+
+
+def test_user_database_skips_results_it_already_has(tmp_path):
+    user_store = UserStatsStore(str(tmp_path / "users.db"))
+    result = entry("alice", 8)
+    assert user_store.record_many([result, result]) == 1
+    assert user_store.record_many([result]) == 0
+    assert user_store.get("alice")['total_quizzes'] == 1
+
+
+def test_older_user_database_gains_result_ids(tmp_path):
+    path = str(tmp_path / "users.db")
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL, percentage REAL NOT NULL, time_taken REAL NOT NULL,
+            category TEXT NOT NULL, timestamp TEXT NOT NULL
+        );
+        INSERT INTO results (username, score, total_questions, percentage, time_taken, category, timestamp)
+        VALUES ('old', 1, 10, 10.0, 5.0, 'Science', '2020-01-01T00:00:00');
+    """)
+    connection.close()
+
+    user_store = UserStatsStore(path)
+    result = entry("alice", 8)
+    assert user_store.record_many([result, result]) == 1
+    assert len(user_store.history("old")) == 1
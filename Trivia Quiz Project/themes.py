@@ -0,0 +1,27 @@
+import os
+import re
+
+STYLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "styles")
+
+# Stylesheets applied for each theme, in order
+THEMES = {
+    "Light": ["light.css", "base.css"],
+    "Dark": ["base.css"]
+}
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def compile_theme(theme, styles_dir=STYLES_DIR):
+    """The minified <style> block for a theme"""
+    parts = []
+    for filename in THEMES.get(theme, THEMES["Light"]):
+        with open(os.path.join(styles_dir, filename), 'r', encoding='utf-8') as f:
+            parts.append(f.read())
+    return f"<style>{minify_css(' '.join(parts))}</style>"
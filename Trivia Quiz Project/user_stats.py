@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    total_quizzes INTEGER NOT NULL DEFAULT 0,
+    total_score REAL NOT NULL DEFAULT 0,
+    average_score REAL NOT NULL DEFAULT 0,
+    best_score REAL NOT NULL DEFAULT 0,
+    total_questions_answered INTEGER NOT NULL DEFAULT 0,
+    total_time_spent REAL NOT NULL DEFAULT 0,
+    first_quiz TEXT,
+    last_quiz TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    result_id TEXT,
+    username TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    total_questions INTEGER NOT NULL,
+    percentage REAL NOT NULL,
+    time_taken REAL NOT NULL,
+    category TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_username ON results (username, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_category ON results (category, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# One result row is inserted and the user's aggregates folded in, in the same transaction
+UPSERT_USER = """
+INSERT INTO users (
+    username, total_quizzes, total_score, average_score, best_score,
+    total_questions_answered, total_time_spent, first_quiz, last_quiz
+) VALUES (:username, 1, :percentage, :percentage, :percentage, :total_questions, :time_taken, :timestamp, :timestamp)
+ON CONFLICT (username) DO UPDATE SET
+    total_quizzes = total_quizzes + 1,
+    total_score = total_score + excluded.total_score,
+    average_score = (total_score + excluded.total_score) / (total_quizzes + 1),
+    best_score = MAX(best_score, excluded.best_score),
+    total_questions_answered = total_questions_answered + excluded.total_questions_answered,
+    total_time_spent = total_time_spent + excluded.total_time_spent,
+    last_quiz = excluded.last_quiz
+"""
+
+# Results carry the ID they were logged with, so saving one twice is a no-op
+INSERT_RESULT = """
+INSERT OR IGNORE INTO results (result_id, username, score, total_questions, percentage, time_taken, category, timestamp)
+VALUES (:id, :username, :score, :total_questions, :percentage, :time_taken, :category, :timestamp)
+"""
+
+# Added after the first release; older databases get the column in UserStatsStore.__init__
+RESULT_ID_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_results_result_id ON results (result_id)"
+
+USER_COLUMNS = (
+    'total_quizzes', 'total_score', 'average_score', 'best_score',
+    'total_questions_answered', 'total_time_spent', 'first_quiz', 'last_quiz'
+)
+
+
+class UserStatsStore:
+    """Per-user aggregates and the full result history in SQLite
+
+    ``users`` holds one row of running totals per player, so showing a
+    player's statistics is a primary-key lookup. ``results`` keeps every
+    finished quiz, indexed by username, category and timestamp, for history
+    queries that never load other players. One connection is shared by all
+    sessions of the process and serialized with a lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            columns = {row['name'] for row in self._connection.execute("PRAGMA table_info(results)")}
+            if 'result_id' not in columns:
+                self._connection.execute("ALTER TABLE results ADD COLUMN result_id TEXT")
+            self._connection.execute(RESULT_ID_INDEX)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def record(self, entry):
+        """Store one quiz result and update its player's totals in a single transaction"""
+        self.record_many([entry])
+
+    def record_many(self, entries):
+        """Store several quiz results and their players' totals in a single transaction
+
+        A result whose ``id`` is already stored is skipped along with its
+        totals, so replaying results from the leaderboard log is safe.
+        Returns how many results were new.
+        """
+        added = 0
+        with self._lock, self._connection:
+            for entry in entries:
+                if 'id' not in entry:
+                    entry = dict(entry, id=None)
+                if self._connection.execute(INSERT_RESULT, entry).rowcount:
+                    self._connection.execute(UPSERT_USER, entry)
+                    added += 1
+        return added
+
+    def get(self, username):
+        """A player's aggregate stats as a dict, or None if they have not finished a quiz"""
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(USER_COLUMNS)} FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def history(self, username, limit=20):
+        """A player's most recent results, newest first"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM results WHERE username = ? ORDER BY timestamp DESC LIMIT ?", (username, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def category_results(self, category, since=None, limit=100):
+        """Most recent results in a category, optionally only those at or after an ISO timestamp"""
+        query = "SELECT * FROM results WHERE category = ?"
+        params = [category]
+        if since is not None:
+            query += " AND timestamp >= ?"
+            params.append(since)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def _histogram(self, query, buckets_per_point, bucket_count):
+        counts = [0] * bucket_count
+        with self._lock:
+            rows = self._connection.execute(query, (buckets_per_point,)).fetchall()
+        for bucket, count in rows:
+            counts[min(max(bucket, 0), bucket_count - 1)] += count
+        return counts
+
+    def score_histogram(self, buckets_per_point, bucket_count):
+        """Number of results per score bucket (percentage * buckets_per_point, rounded)"""
+        return self._histogram(
+            "SELECT CAST(ROUND(percentage * ?) AS INTEGER) AS bucket, COUNT(*) FROM results GROUP BY bucket",
+            buckets_per_point, bucket_count
+        )
+
+    def best_score_histogram(self, buckets_per_point, bucket_count):
+        """Number of players per best-score bucket"""
+        return self._histogram(
+            "SELECT CAST(ROUND(best_score * ?) AS INTEGER) AS bucket, COUNT(*) FROM users GROUP BY bucket",
+            buckets_per_point, bucket_count
+        )
+
+    def import_users(self, users):
+        """One-time migration of the user stats dict kept in the JSON leaderboard snapshot
+
+        Returns the number of users imported; later calls import nothing, so
+        results already recorded here are never counted twice.
+        """
+        with self._lock, self._connection:
+            if self._connection.execute("SELECT 1 FROM meta WHERE key = 'users_imported'").fetchone():
+                return 0
+            self._connection.executemany(
+                f"INSERT OR IGNORE INTO users (username, {', '.join(USER_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in USER_COLUMNS)})",
+                [(username, *(stats.get(column) for column in USER_COLUMNS)) for username, stats in users.items()]
+            )
+            self._connection.execute("INSERT INTO meta (key, value) VALUES ('users_imported', datetime('now'))")
+        return len(users)